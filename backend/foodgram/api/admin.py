@@ -28,6 +28,8 @@ class RecipeAdmin(admin.ModelAdmin):
         'id',
         'name',
         'author',
+        'favorites_count',
+        'carts_count',
     )
     list_display_links = ('id', 'name',)
     search_fields = ('name', 'author__username',)
@@ -36,7 +38,7 @@ class RecipeAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
     def count_in_favorite(self, obj):
-        return Favorite.objects.filter(recipe=obj).count()
+        return obj.favorites_count
 
     count_in_favorite.short_description = 'Сколько раз добавлен в избранное'
 
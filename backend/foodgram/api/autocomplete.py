@@ -0,0 +1,59 @@
+from bisect import bisect_left
+from functools import lru_cache
+
+from django.conf import settings
+
+from .models import Ingredient
+from .versions import get_version
+
+_index = None
+
+
+class IngredientIndex:
+    """Отсортированный по названию словарь ингредиентов.
+
+    Совпадения по началу названия ищутся бинарным поиском, затем
+    добавляются совпадения по подстроке. Ответы на повторяющиеся
+    запросы берутся из LRU-кэша.
+    """
+
+    def __init__(self, rows, version=None):
+        rows = sorted((name.lower(), pk) for pk, name in rows)
+        self.names = [name for name, _ in rows]
+        self.ids = [pk for _, pk in rows]
+        self.version = version
+        self.search = lru_cache(
+            maxsize=settings.INGREDIENT_SEARCH_CACHE_SIZE)(self._search)
+
+    def _search(self, text, limit):
+        text = text.lower()
+        result = []
+        position = bisect_left(self.names, text)
+        while (position < len(self.names) and len(result) < limit
+               and self.names[position].startswith(text)):
+            result.append(self.ids[position])
+            position += 1
+        if len(result) < limit:
+            for name, pk in zip(self.names, self.ids):
+                if text in name and not name.startswith(text):
+                    result.append(pk)
+                    if len(result) == limit:
+                        break
+        return tuple(result)
+
+
+def get_ingredient_index():
+    """Индекс ингредиентов, перестраиваемый при смене версии словаря."""
+    global _index
+    version = get_version('ingredients')
+    if _index is None or _index.version != version:
+        _index = IngredientIndex(
+            Ingredient.objects.values_list('id', 'name'), version)
+    return _index
+
+
+def search_ingredients(text, limit=None):
+    """Id ингредиентов: сначала совпадения по началу, затем по подстроке."""
+    if limit is None:
+        limit = settings.INGREDIENT_SEARCH_LIMIT
+    return get_ingredient_index().search(text.strip(), limit)
@@ -0,0 +1,73 @@
+from collections import defaultdict
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import Follow, User
+
+from .models import Cart, Favorite, Recipe
+
+COUNTERS = {
+    Favorite: (Recipe, 'favorites_count', 'recipe'),
+    Cart: (Recipe, 'carts_count', 'recipe'),
+    Recipe: (User, 'recipes_count', 'author'),
+    Follow: (User, 'followers_count', 'author'),
+}
+
+
+def update_counter(model, ids, delta):
+    """Атомарное изменение счётчика записей model у объектов с id из ids.
+
+    Вызывается в той же транзакции, что и вставка или удаление записей.
+    Счётчик не опускается ниже нуля.
+    """
+    ids = list(ids)
+    if not ids:
+        return
+    owner, field, _ = COUNTERS[model]
+    queryset = owner.objects.filter(pk__in=ids)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def update_counters(model, ids, sign=1):
+    """Изменение счётчиков с учётом повторов id: по запросу на приращение."""
+    totals = defaultdict(int)
+    for pk in ids:
+        totals[pk] += 1
+    groups = defaultdict(list)
+    for pk, total in totals.items():
+        groups[total].append(pk)
+    for total, group in groups.items():
+        update_counter(model, group, sign * total)
+
+
+def instance_changed(instance, delta):
+    """Изменение счётчика владельца одной записи."""
+    _, _, relation = COUNTERS[type(instance)]
+    update_counter(
+        type(instance), [getattr(instance, f'{relation}_id')], delta)
+
+
+def actual_count(model):
+    _, _, relation = COUNTERS[model]
+    return Coalesce(Subquery(
+        model.objects.filter(**{relation: OuterRef('pk')})
+        .order_by().values(relation)
+        .annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def reconcile_counters():
+    """Исправление расхождений счётчиков с данными.
+
+    Возвращает словарь: поле счётчика → число исправленных объектов.
+    """
+    fixed = {}
+    for model, (owner, field, _) in COUNTERS.items():
+        fixed[f'{owner._meta.model_name}.{field}'] = (
+            owner.objects.exclude(**{field: actual_count(model)})
+            .update(**{field: actual_count(model)})
+        )
+    return fixed
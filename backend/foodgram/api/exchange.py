@@ -0,0 +1,177 @@
+import json
+from collections import defaultdict
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from users.models import User
+
+from .counters import update_counters
+from .feed import fan_out
+from .models import (Ingredient, IngredientAmount, Recipe, TagRecipe,
+                     get_tags_mask)
+from .pantry import record_changes
+from .tags import get_tag_ids
+from .versions import bump_version
+
+EXPORT_FIELDS = ('id', 'name', 'text', 'cooking_time', 'image', 'pub_date',
+                 'author__username', 'author__email')
+
+
+def iter_chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def export_recipes(chunk_size=500):
+    """Строки NDJSON: рецепт с автором, тегами и ингредиентами."""
+    recipes = Recipe.objects.order_by('id').values(*EXPORT_FIELDS)
+    for chunk in iter_chunks(recipes.iterator(chunk_size=chunk_size),
+                             chunk_size):
+        ids = [recipe['id'] for recipe in chunk]
+        tags = defaultdict(list)
+        for recipe_id, slug in (
+            TagRecipe.objects.filter(recipe_id__in=ids)
+            .order_by('id').values_list('recipe_id', 'tag__slug')
+        ):
+            tags[recipe_id].append(slug)
+        ingredients = defaultdict(list)
+        for recipe_id, name, unit, amount in (
+            IngredientAmount.objects.filter(recipe_id__in=ids)
+            .order_by('id')
+            .values_list('recipe_id', 'ingredient__name',
+                         'ingredient__measurement_unit', 'amount')
+        ):
+            ingredients[recipe_id].append(
+                {'name': name, 'measurement_unit': unit, 'amount': amount})
+        for recipe in chunk:
+            record = {
+                'id': recipe['id'],
+                'author': {'username': recipe['author__username'],
+                           'email': recipe['author__email']},
+                'name': recipe['name'],
+                'text': recipe['text'],
+                'cooking_time': recipe['cooking_time'],
+                'image': recipe['image'],
+                'pub_date': recipe['pub_date'].isoformat(),
+                'tags': tags[recipe['id']],
+                'ingredients': ingredients[recipe['id']],
+            }
+            yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def find_ingredients(keys):
+    return {
+        (name, unit): pk for pk, name, unit in
+        Ingredient.objects.filter(name__in={name for name, _ in keys})
+        .values_list('id', 'name', 'measurement_unit')
+    }
+
+
+def get_ingredients(records):
+    """Ингредиенты порции по (название, единица), недостающие создаются.
+
+    bulk_create не отправляет сигналов, поэтому версия ингредиентов
+    сдвигается здесь, как в load_data.
+    """
+    keys = {
+        (item['name'], item['measurement_unit'])
+        for record in records for item in record['ingredients']
+    }
+    found = find_ingredients(keys)
+    if not keys - found.keys():
+        return found
+    Ingredient.objects.bulk_create(
+        (Ingredient(name=name, measurement_unit=unit)
+         for name, unit in keys - found.keys()),
+        ignore_conflicts=True
+    )
+    transaction.on_commit(lambda: bump_version('ingredients'))
+    found = find_ingredients(keys)
+    missing = keys - found.keys()
+    if missing:
+        raise ValueError(
+            'Не удалось найти созданные ингредиенты: ' + ', '.join(
+                f'{name} ({unit})' for name, unit in sorted(missing)))
+    return found
+
+
+def create_recipes(recipes):
+    """Массовое создание рецептов с получением их id.
+
+    При сохранении по одному счётчики авторов меняют сигналы.
+    """
+    if connection.features.can_return_ids_from_bulk_insert:
+        recipes = Recipe.objects.bulk_create(recipes)
+        update_counters(Recipe, (recipe.author_id for recipe in recipes))
+        return recipes
+    for recipe in recipes:
+        recipe.save()
+    return recipes
+
+
+def import_chunk(records):
+    """Импорт порции рецептов. Возвращает число созданных и пропущенных."""
+    authors = {
+        user.username: user for user in User.objects.filter(
+            username__in={record['author']['username'] for record in records})
+    }
+    tags = get_tag_ids()
+    records = [record for record in records
+               if record['author']['username'] in authors]
+    ingredients = get_ingredients(records)
+    recipes = [
+        Recipe(
+            author=authors[record['author']['username']],
+            name=record['name'],
+            text=record['text'],
+            cooking_time=record['cooking_time'],
+            image=record['image'],
+            tags_mask=get_tags_mask(
+                tags[slug] for slug in record['tags'] if slug in tags),
+        )
+        for record in records
+    ]
+    with transaction.atomic():
+        recipes = create_recipes(recipes)
+        for recipe, record in zip(recipes, records):
+            recipe.pub_date = parse_datetime(record['pub_date'])
+        Recipe.objects.bulk_update(recipes, ['pub_date'])
+        fan_out(recipes)
+        TagRecipe.objects.bulk_create(
+            TagRecipe(recipe=recipe, tag_id=tags[slug])
+            for recipe, record in zip(recipes, records)
+            for slug in dict.fromkeys(record['tags']) if slug in tags
+        )
+        IngredientAmount.objects.bulk_create(
+            IngredientAmount(
+                recipe=recipe,
+                ingredient_id=ingredients[
+                    (item['name'], item['measurement_unit'])],
+                amount=item['amount'],
+            )
+            for recipe, record in zip(recipes, records)
+            for item in record['ingredients']
+        )
+        record_changes(recipe.pk for recipe in recipes)
+    return recipes
+
+
+def import_recipes(lines, chunk_size=500):
+    """Импорт NDJSON порциями фиксированного размера.
+
+    Рецепты авторов, которых нет в базе, пропускаются.
+    Возвращает число созданных и пропущенных рецептов.
+    """
+    created = skipped = 0
+    records = (json.loads(line) for line in lines if line.strip())
+    for chunk in iter_chunks(records, chunk_size):
+        recipes = import_chunk(chunk)
+        created += len(recipes)
+        skipped += len(chunk) - len(recipes)
+    return created, skipped
@@ -0,0 +1,105 @@
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from users.models import Follow
+
+from .models import FeedEntry, MaterializedFeed, Recipe
+
+ENTRY_ORDERING = ('-pub_date', '-recipe_id')
+RECIPE_ORDERING = ('-pub_date', '-id')
+
+
+def is_materialized(user):
+    return MaterializedFeed.objects.filter(user=user).exists()
+
+
+def get_feed_recipes(user):
+    """Рецепты авторов из подписок одним запросом по индексу автора."""
+    return Recipe.objects.filter(
+        author__in=Follow.objects.filter(user=user).values('author_id'))
+
+
+def get_feed_entries(user):
+    return FeedEntry.objects.filter(user=user)
+
+
+def fan_out(recipes):
+    """Добавление новых рецептов в материализованные ленты подписчиков."""
+    by_author = {}
+    for recipe in recipes:
+        by_author.setdefault(recipe.author_id, []).append(recipe)
+    followers = Follow.objects.filter(
+        author_id__in=list(by_author), user__materialized_feed__isnull=False
+    ).values_list('user_id', 'author_id')
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, recipe=recipe,
+                      pub_date=recipe.pub_date)
+            for user_id, author_id in followers
+            for recipe in by_author[author_id]
+        ),
+        ignore_conflicts=True
+    )
+
+
+def follow_changed(follow, created):
+    """Добавление или удаление рецептов автора в ленте подписчика."""
+    if not is_materialized(follow.user_id):
+        return
+    if not created:
+        FeedEntry.objects.filter(
+            user_id=follow.user_id, recipe__author_id=follow.author_id
+        ).delete()
+        return
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=follow.user_id, recipe_id=pk, pub_date=date)
+            for pk, date in Recipe.objects.filter(
+                author_id=follow.author_id).values_list('pk', 'pub_date')
+        ),
+        ignore_conflicts=True
+    )
+
+
+def materialize(user_id, chunk_size=1000):
+    """Полное построение ленты пользователя порциями."""
+    recipes = get_feed_recipes(user_id).values_list('pk', 'pub_date')
+    with transaction.atomic():
+        MaterializedFeed.objects.get_or_create(user_id=user_id)
+        FeedEntry.objects.filter(user_id=user_id).delete()
+        rows = recipes.iterator()
+        while True:
+            entries = [
+                FeedEntry(user_id=user_id, recipe_id=pk, pub_date=date)
+                for pk, date in islice(rows, chunk_size)
+            ]
+            if not entries:
+                break
+            FeedEntry.objects.bulk_create(entries)
+
+
+def rebuild_feeds(threshold=None):
+    """Материализация лент пользователей с большим числом подписок.
+
+    Ленты остальных пользователей удаляются: им хватает запроса
+    по подпискам. Возвращает число материализованных лент.
+    """
+    if threshold is None:
+        threshold = settings.FEED_FANOUT_THRESHOLD
+    users = (
+        Follow.objects.values('user_id').annotate(total=Count('pk'))
+        .filter(total__gte=threshold).values('user_id')
+    )
+    with transaction.atomic():
+        stale = MaterializedFeed.objects.exclude(user_id__in=users)
+        FeedEntry.objects.filter(
+            user_id__in=stale.values('user_id')).delete()
+        stale.delete()
+    total = 0
+    for row in users.iterator():
+        materialize(row['user_id'])
+        total += 1
+    return total
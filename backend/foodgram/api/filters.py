@@ -1,15 +1,27 @@
+from django.db.models import Case, IntegerField, When
 from django_filters import rest_framework
 
-from .models import Ingredient, Recipe, Tag
+from .autocomplete import search_ingredients
+from .models import Ingredient, Recipe
+from .search import search_recipes
+from .tags import filter_by_tags, tag_choices
 
 
 class IngredientFilter(rest_framework.FilterSet):
     """Фильтр ингредиентов."""
 
-    name = rest_framework.CharFilter(
-        field_name="name",
-        lookup_expr="icontains"
-    )
+    name = rest_framework.CharFilter(method='search_name')
+
+    def search_name(self, queryset, name, value):
+        """Ингредиенты из индекса автодополнения в порядке релевантности."""
+        ids = search_ingredients(value)
+        if not ids:
+            return queryset.none()
+        position = Case(
+            *(When(pk=pk, then=index) for index, pk in enumerate(ids)),
+            output_field=IntegerField()
+        )
+        return queryset.filter(pk__in=ids).order_by(position)
 
     class Meta:
         model = Ingredient
@@ -26,12 +38,23 @@ class RecipeFilter(rest_framework.FilterSet):
     is_in_shopping_cart = rest_framework.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
-    tags = rest_framework.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        queryset=Tag.objects.all(),
-        to_field_name='slug',
+    tags = rest_framework.MultipleChoiceFilter(
+        choices=tag_choices,
+        method='get_tags'
     )
 
+    search = rest_framework.CharFilter(method='get_search')
+
+    def get_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию."""
+        return search_recipes(queryset, value)
+
+    def get_tags(self, queryset, name, value):
+        """Рецепты с любым из тегов по маске тегов."""
+        if not value:
+            return queryset
+        return filter_by_tags(queryset, value)
+
     def get_is_favorited(self, queryset, name, value):
         """Queryset для избранного."""
         if value and self.request.user.is_authenticated:
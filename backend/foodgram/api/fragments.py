@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .versions import get_version
+
+
+def fragment_keys(recipe_ids):
+    version = get_version('recipes')
+    return {f'recipe:{version}:{pk}': pk for pk in recipe_ids}
+
+
+def get_fragments(recipe_ids):
+    """Общие для всех пользователей представления рецептов из кэша."""
+    keys = fragment_keys(recipe_ids)
+    return {
+        keys[key]: fragment
+        for key, fragment in cache.get_many(list(keys)).items()
+    }
+
+
+def set_fragments(fragments):
+    keys = fragment_keys(fragments)
+    cache.set_many(
+        {key: fragments[pk] for key, pk in keys.items()},
+        settings.RECIPE_CACHE_TIMEOUT
+    )
+
+
+def invalidate_fragments(recipe_ids):
+    """Удаление закэшированных представлений изменившихся рецептов."""
+    cache.delete_many(list(fragment_keys(recipe_ids)))
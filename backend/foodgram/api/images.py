@@ -0,0 +1,116 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from PIL import Image, features
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+
+from .fragments import invalidate_fragments
+from .models import Recipe
+
+IMAGE_FORMATS = (('webp', 'WEBP'), ('jpeg', 'JPEG'))
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_pid = None
+
+
+def get_executor():
+    """Пул потоков для обработки картинок, свой в каждом процессе."""
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.RECIPE_IMAGE_WORKERS,
+            thread_name_prefix='recipe-images'
+        )
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def get_formats():
+    return [(extension, image_format)
+            for extension, image_format in IMAGE_FORMATS
+            if image_format != 'WEBP' or features.check('webp')]
+
+
+def variant_name(image_name, size, extension):
+    directory, filename = os.path.split(image_name)
+    stem = os.path.splitext(filename)[0]
+    return f'{directory}/variants/{stem}_{size}.{extension}'
+
+
+def variant_urls(recipe):
+    """Относительные адреса уменьшенных копий картинки рецепта."""
+    if not recipe.image or not recipe.image_variants_ready:
+        return None
+    return image_variant_urls(recipe.image.name)
+
+
+def image_variant_urls(image_name):
+    formats = get_formats()
+    return {
+        size: {
+            extension: default_storage.url(
+                variant_name(image_name, size, extension))
+            for extension, _ in formats
+        }
+        for size in settings.RECIPE_IMAGE_SIZES
+    }
+
+
+def generate_variants(recipe_id, image_name):
+    """Создание уменьшенных копий картинки в форматах WebP и JPEG."""
+    with default_storage.open(image_name) as file:
+        original = Image.open(file)
+        original.load()
+    if original.mode != 'RGB':
+        background = Image.new('RGB', original.size, 'white')
+        original = original.convert('RGBA')
+        background.paste(original, mask=original.split()[-1])
+        original = background
+    for size, width in settings.RECIPE_IMAGE_SIZES.items():
+        image = original.copy()
+        image.thumbnail((width, width), Image.LANCZOS)
+        for extension, image_format in get_formats():
+            buffer = BytesIO()
+            image.save(buffer, image_format,
+                       quality=settings.RECIPE_IMAGE_QUALITY)
+            name = variant_name(image_name, size, extension)
+            default_storage.delete(name)
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+    updated = Recipe.objects.filter(
+        pk=recipe_id, image=image_name
+    ).update(image_variants_ready=True)
+    if updated:
+        invalidate_fragments([recipe_id])
+
+
+def generate_variants_task(recipe_id, image_name):
+    """generate_variants в потоке пула.
+
+    Future никто не ждёт, поэтому ошибка пишется в лог; соединение
+    потока с базой закрывается после каждой задачи.
+    """
+    try:
+        generate_variants(recipe_id, image_name)
+    except Exception:
+        logger.exception(
+            'Не удалось создать уменьшенные копии картинки %s рецепта %s.',
+            image_name, recipe_id)
+    finally:
+        connection.close()
+
+
+def schedule_variants(recipe):
+    """Обработка картинки в фоне после фиксации транзакции."""
+    recipe_id, image_name = recipe.pk, recipe.image.name
+    transaction.on_commit(
+        lambda: get_executor().submit(
+            generate_variants_task, recipe_id, image_name)
+    )
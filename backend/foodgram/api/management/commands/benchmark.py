@@ -0,0 +1,206 @@
+import base64
+import io
+import json
+import math
+import time
+from itertools import product
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (CaptureQueriesContext,
+                               setup_test_environment,
+                               teardown_test_environment)
+from PIL import Image
+from rest_framework.test import APIClient
+
+from api.models import Ingredient, Recipe, Tag
+from users.models import User
+
+from .seed_data import SEED_PREFIX
+
+RECIPES_URL = '/api/recipes/'
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def png_data_url():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), '#49B64E').save(buffer, 'PNG')
+    return ('data:image/png;base64,'
+            + base64.b64encode(buffer.getvalue()).decode())
+
+
+def compare(report, baseline, tolerance):
+    """Сценарии, ставшие медленнее на tolerance или с большим числом
+    запросов, чем в базовом замере."""
+    regressions = []
+    for name, result in report['scenarios'].items():
+        base = baseline['scenarios'].get(name)
+        if base is None:
+            continue
+        if result['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append({'scenario': name, 'metric': 'p95_ms',
+                                'baseline': base['p95_ms'],
+                                'current': result['p95_ms']})
+        if result['queries'] > base['queries']:
+            regressions.append({'scenario': name, 'metric': 'queries',
+                                'baseline': base['queries'],
+                                'current': result['queries']})
+    return regressions
+
+
+class Command(BaseCommand):
+    help = ('Замер задержек и числа SQL-запросов основных эндпоинтов '
+            'на данных seed_data через тестовый клиент.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--output', help='Файл для отчёта, по умолчанию stdout.')
+        parser.add_argument(
+            '--baseline', help='Базовый отчёт для сравнения.')
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Записать отчёт в файл --baseline вместо сравнения.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост p95 относительно базового замера.')
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Завершиться с ошибкой при регрессии.')
+
+    def handle(self, *args, **options):
+        if options['save_baseline'] and not options['baseline']:
+            raise CommandError('--save-baseline требует пути --baseline.')
+        users = list(
+            User.objects.filter(username__startswith=SEED_PREFIX)
+            .order_by('id')[:2]
+        )
+        if len(users) < 2:
+            raise CommandError('Сначала наполните базу командой seed_data.')
+        self.client = APIClient()
+        self.client.force_authenticate(users[0])
+        self.options = options
+        report = {
+            'iterations': options['iterations'],
+            'recipes': Recipe.objects.count(),
+            'users': User.objects.count(),
+            'scenarios': {},
+        }
+        setup_test_environment()
+        try:
+            # Сценарии генерируются по ходу замеров: recipes_update
+            # изменяет рецепт, созданный в recipes_create.
+            for name, method, url, data in self.get_scenarios(users):
+                report['scenarios'][name] = self.measure(method, url, data)
+        finally:
+            teardown_test_environment()
+            self.cleanup()
+        self.finish(report, options)
+
+    def finish(self, report, options):
+        baseline_path = options['baseline']
+        if baseline_path and options['save_baseline']:
+            with open(baseline_path, 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        elif baseline_path:
+            with open(baseline_path, encoding='utf-8') as file:
+                report['regressions'] = compare(
+                    report, json.load(file), options['tolerance'])
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+        if report.get('regressions') and options['fail_on_regression']:
+            raise CommandError(
+                f'Регрессий: {len(report["regressions"])}.')
+
+    def get_scenarios(self, users):
+        user, author = users
+        slugs = list(Tag.objects.order_by('id').values_list('slug', flat=True))
+        recipe = Recipe.objects.filter(author=author).order_by('id').first()
+        word = recipe.text.split()[0].strip(',') if recipe else 'соль'
+        filters = product(
+            ({}, {'author': author.pk}),
+            ({}, {'tags': slugs[:1]}, {'tags': slugs[:2]}),
+            ({}, {'is_favorited': 1}),
+            ({}, {'is_in_shopping_cart': 1}),
+            ({}, {'search': word}),
+        )
+        for combination in filters:
+            params = {'limit': 6}
+            for part in combination:
+                params.update(part)
+            label = ','.join(
+                f'{key}={len(value)}' if isinstance(value, list) else key
+                for key, value in params.items() if key != 'limit'
+            )
+            yield f'recipes_list[{label}]', 'get', RECIPES_URL, params
+        if recipe is not None:
+            yield ('recipes_detail', 'get',
+                   f'{RECIPES_URL}{recipe.pk}/', None)
+        yield ('subscriptions', 'get', '/api/users/subscriptions/',
+               {'limit': 6, 'recipes_limit': 3})
+        yield ('download_shopping_cart', 'get',
+               f'{RECIPES_URL}download_shopping_cart/', None)
+        payload = self.recipe_payload()
+        yield 'recipes_create', 'post', RECIPES_URL, payload
+        created = Recipe.objects.filter(author=user).order_by('-id').first()
+        yield ('recipes_update', 'patch',
+               f'{RECIPES_URL}{created.pk}/', payload)
+
+    def recipe_payload(self):
+        ingredients = Ingredient.objects.order_by('id').values_list(
+            'id', flat=True)[:5]
+        return {
+            'name': 'Замер',
+            'text': 'Рецепт для замера производительности.',
+            'cooking_time': 30,
+            'image': png_data_url(),
+            'tags': list(Tag.objects.values_list('id', flat=True)[:2]),
+            'ingredients': [
+                {'id': ingredient, 'amount': 100}
+                for ingredient in ingredients
+            ],
+        }
+
+    def request(self, method, url, data):
+        kwargs = {'format': 'json'} if method != 'get' else {}
+        response = getattr(self.client, method)(url, data, **kwargs)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        if response.status_code >= 400:
+            raise CommandError(
+                f'{method.upper()} {url}: {response.status_code}')
+        return response
+
+    def measure(self, method, url, data):
+        for _ in range(self.options['warmup']):
+            self.request(method, url, data)
+        durations = []
+        queries = []
+        for _ in range(self.options['iterations']):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                self.request(method, url, data)
+                durations.append((time.perf_counter() - started) * 1000)
+            queries.append(len(context.captured_queries))
+        return {
+            'p50_ms': round(percentile(durations, 50), 2),
+            'p95_ms': round(percentile(durations, 95), 2),
+            'queries': max(queries),
+        }
+
+    def cleanup(self):
+        """Удаление рецептов, созданных сценарием recipes_create."""
+        for recipe in Recipe.objects.filter(
+                author__username__startswith=SEED_PREFIX, name='Замер'):
+            recipe.delete()
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.recommendations import build_recommendations
+
+
+class Command(BaseCommand):
+    help = ('Пересчёт рекомендаций «с этим рецептом также добавляют '
+            'в избранное».')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since-hours', type=float,
+            help=('Пересчитать только рецепты, затронутые добавлениями '
+                  'в избранное за последние часы. Удаления из избранного '
+                  'учитываются при полном пересчёте.')
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since_hours'] is not None:
+            since = timezone.now() - timedelta(hours=options['since_hours'])
+        total = build_recommendations(since)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано рецептов: {total}.'))
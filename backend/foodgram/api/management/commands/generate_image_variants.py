@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from api.images import generate_variants
+from api.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создание уменьшенных копий картинок рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересоздать копии и для уже обработанных рецептов.'
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['all']:
+            recipes = recipes.filter(image_variants_ready=False)
+        total = failed = 0
+        for recipe_id, image_name in recipes.values_list(
+                'id', 'image').iterator():
+            try:
+                generate_variants(recipe_id, image_name)
+            except Exception as error:
+                failed += 1
+                self.stderr.write(
+                    f'Рецепт {recipe_id} ({image_name}): {error}')
+                continue
+            total += 1
+        self.stdout.write(self.style.SUCCESS(f'Обработано рецептов: {total}.'))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'С ошибками: {failed}.'))
@@ -0,0 +1,32 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.exchange import import_recipes
+
+
+class Command(BaseCommand):
+    help = 'Загрузка рецептов из файла NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл с рецептами, по умолчанию stdin.'
+        )
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            if options['path'] == '-':
+                created, skipped = import_recipes(
+                    sys.stdin, options['chunk_size'])
+            else:
+                with open(options['path'], encoding='utf-8') as file:
+                    created, skipped = import_recipes(
+                        file, options['chunk_size'])
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено рецептов: {created}, '
+            f'пропущено без автора: {skipped}.'
+        ))
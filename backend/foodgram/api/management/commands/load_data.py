@@ -1,17 +1,122 @@
+import csv
 import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
 from api.models import Ingredient
-from django.core.management.base import BaseCommand
+from api.versions import bump_version
+
+
+def read_json(file, chunk_size=64 * 1024):
+    """Потоковое чтение json-массива объектов без загрузки файла целиком."""
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_size).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('Ожидается json-массив ингредиентов.')
+    buffer = buffer[1:]
+    while True:
+        buffer = buffer.lstrip().lstrip(',').lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                raise CommandError('Некорректный json.')
+            buffer += chunk
+            continue
+        yield item
+        buffer = buffer[end:]
+
+
+def read_csv(file):
+    """Потоковое чтение csv со столбцами: название, единица измерения."""
+    reader = csv.reader(file)
+    for row in reader:
+        if not row:
+            continue
+        if len(row) < 2:
+            raise CommandError(
+                f'Строка {reader.line_num}: ожидается название и единица '
+                f'измерения.')
+        yield {'name': row[0], 'measurement_unit': row[1]}
+
+
+def batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
 
 class Command(BaseCommand):
+    help = 'Загрузка словаря ингредиентов из json или csv файла.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='ingredients.json',
+            help='Путь к файлу ingredients.json или ingredients.csv.'
+        )
+        parser.add_argument(
+            '--format', choices=('json', 'csv'),
+            help='Формат файла, по умолчанию определяется по расширению.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Количество ингредиентов в одном запросе.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Показать новые ингредиенты, ничего не записывая.'
+        )
 
     def handle(self, *args, **options):
-        with open('ingredients.json', 'rb') as ingredient:
-            data = json.load(ingredient)
-            for i in data:
-                ingredient = Ingredient()
-                ingredient.name = i['name']
-                ingredient.measurement_unit = i['measurement_unit']
-                ingredient.save()
-                print(i['name'], i['measurement_unit'])
+        path = options['path']
+        file_format = (
+            options['format'] or os.path.splitext(path)[1].lstrip('.')
+        )
+        if file_format not in ('json', 'csv'):
+            raise CommandError(f'Неизвестный формат файла {path}.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        reader = read_json if file_format == 'json' else read_csv
+        created = existing = 0
+        seen = set()
+        with open(path, encoding='utf-8', newline='') as file:
+            with transaction.atomic():
+                for batch in batches(reader(file), options['batch_size']):
+                    keys = {
+                        (row['name'].strip(), row['measurement_unit'].strip())
+                        for row in batch
+                    } - seen
+                    seen |= keys
+                    found = set(
+                        Ingredient.objects
+                        .filter(name__in={name for name, _ in keys})
+                        .values_list('name', 'measurement_unit')
+                    ) & keys
+                    new = sorted(keys - found)
+                    existing += len(found)
+                    created += len(new)
+                    if options['dry_run']:
+                        for name, unit in new:
+                            self.stdout.write(f'+ {name} ({unit})')
+                        continue
+                    Ingredient.objects.bulk_create(
+                        (Ingredient(name=name, measurement_unit=unit)
+                         for name, unit in new),
+                        ignore_conflicts=True
+                    )
+        if created and not options['dry_run']:
+            bump_version('ingredients')
+        action = 'Будет добавлено' if options['dry_run'] else 'Добавлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action}: {created}, уже в базе: {existing}.'
+        ))
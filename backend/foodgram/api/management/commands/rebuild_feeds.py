@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.feed import rebuild_feeds
+
+
+class Command(BaseCommand):
+    help = ('Материализация лент подписок для пользователей '
+            'с большим числом подписок.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threshold', type=int,
+            help='Минимальное число подписок, по умолчанию '
+                 'FEED_FANOUT_THRESHOLD.'
+        )
+
+    def handle(self, *args, **options):
+        total = rebuild_feeds(options['threshold'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Материализовано лент: {total}.'))
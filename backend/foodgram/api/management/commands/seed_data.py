@@ -0,0 +1,154 @@
+import io
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from PIL import Image
+
+from api.counters import reconcile_counters
+from api.exchange import import_chunk, iter_chunks
+from api.models import Cart, Favorite, Ingredient, Recipe, Tag
+from users.models import Follow, User
+
+SEED_PREFIX = 'seed_user_'
+SEED_PASSWORD = 'seed-password'
+SEED_IMAGE = 'recipe/image/seed.png'
+SEED_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+
+
+def seed_image():
+    """Общая картинка для всех сгенерированных рецептов."""
+    if not default_storage.exists(SEED_IMAGE):
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 64), '#E26C2D').save(buffer, 'PNG')
+        default_storage.save(SEED_IMAGE, ContentFile(buffer.getvalue()))
+    return SEED_IMAGE
+
+
+class Command(BaseCommand):
+    help = ('Детерминированное наполнение базы синтетическими данными '
+            'для нагрузочных замеров.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument(
+            '--favorites', type=int, default=20,
+            help='Избранных рецептов на пользователя.')
+        parser.add_argument(
+            '--carts', type=int, default=5,
+            help='Рецептов в списке покупок на пользователя.')
+        parser.add_argument(
+            '--follows', type=int, default=10,
+            help='Подписок на пользователя.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--ingredients-file', default='ingredients.json',
+            help='Словарь ингредиентов (копия data/ingredients.json), '
+                 'загружается, если ингредиентов в базе нет.')
+        parser.add_argument(
+            '--flush', action='store_true',
+            help='Удалить ранее сгенерированные данные.')
+
+    def handle(self, *args, **options):
+        seeded = User.objects.filter(username__startswith=SEED_PREFIX)
+        if options['flush']:
+            seeded.delete()
+        elif seeded.exists():
+            raise CommandError(
+                'Синтетические данные уже есть, используйте --flush.')
+        if not Ingredient.objects.exists():
+            call_command('load_data', options['ingredients_file'])
+        rng = random.Random(options['seed'])
+        users = self.create_users(options['users'])
+        self.create_recipes(rng, users, options)
+        recipes = list(
+            Recipe.objects.filter(author__in=users)
+            .order_by('id').values_list('id', flat=True)
+        )
+        self.create_relations(rng, users, recipes, options)
+        reconcile_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пользователей: {len(users)}, рецептов: {len(recipes)}.'))
+
+    def create_users(self, total):
+        password = make_password(SEED_PASSWORD)
+        User.objects.bulk_create(
+            User(
+                username=f'{SEED_PREFIX}{number}',
+                email=f'{SEED_PREFIX}{number}@example.com',
+                first_name='Пользователь',
+                last_name=str(number),
+                password=password,
+            )
+            for number in range(total)
+        )
+        return list(
+            User.objects.filter(username__startswith=SEED_PREFIX)
+            .order_by('id')
+        )
+
+    def create_recipes(self, rng, users, options):
+        for name, color, slug in SEED_TAGS:
+            Tag.objects.get_or_create(
+                slug=slug, defaults={'name': name, 'color': color})
+        slugs = list(Tag.objects.order_by('id').values_list('slug', flat=True))
+        ingredients = list(
+            Ingredient.objects.order_by('id')
+            .values_list('name', 'measurement_unit')
+        )
+        per_recipe = min(options['ingredients_per_recipe'], len(ingredients))
+        image = seed_image()
+        started = timezone.now() - timedelta(minutes=options['recipes'])
+        records = (
+            {
+                'author': {'username': rng.choice(users).username},
+                'name': f'Рецепт {number}',
+                'text': ', '.join(
+                    name for name, _ in rng.sample(ingredients, 3)),
+                'cooking_time': rng.randint(5, 180),
+                'image': image,
+                'pub_date': (
+                    started + timedelta(minutes=number)).isoformat(),
+                'tags': rng.sample(slugs, rng.randint(1, len(slugs))),
+                'ingredients': [
+                    {'name': name, 'measurement_unit': unit,
+                     'amount': rng.randint(1, 500)}
+                    for name, unit in rng.sample(ingredients, per_recipe)
+                ],
+            }
+            for number in range(options['recipes'])
+        )
+        for chunk in iter_chunks(records, 500):
+            import_chunk(chunk)
+
+    def create_relations(self, rng, users, recipes, options):
+        for model, option in ((Favorite, 'favorites'), (Cart, 'carts')):
+            model.objects.bulk_create(
+                (
+                    model(user=user, recipe_id=recipe_id)
+                    for user in users
+                    for recipe_id in rng.sample(
+                        recipes, min(options[option], len(recipes)))
+                ),
+                ignore_conflicts=True
+            )
+        follows = min(options['follows'], len(users) - 1)
+        Follow.objects.bulk_create(
+            (
+                Follow(user=user, author=users[other + (other >= number)])
+                for number, user in enumerate(users)
+                for other in rng.sample(range(len(users) - 1), follows)
+            ),
+            ignore_conflicts=True
+        )
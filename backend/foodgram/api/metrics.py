@@ -0,0 +1,231 @@
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from threading import Lock
+
+from django.conf import settings
+
+from foodgram.db.pool import get_pools
+
+PREFIX = 'foodgram'
+
+
+class QueryBudgetExceeded(Exception):
+    """Запрос к API сделал больше SQL-запросов, чем разрешено."""
+
+
+class Histogram:
+    """Гистограмма Prometheus с фиксированными границами корзин."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {total}'
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+class EndpointMetrics:
+    def __init__(self):
+        self.duration = Histogram(settings.METRICS_DURATION_BUCKETS)
+        self.queries = Histogram(settings.METRICS_QUERY_BUCKETS)
+        self.serialize = Histogram(settings.METRICS_DURATION_BUCKETS)
+        self.sql_seconds = 0
+        self.render_seconds = 0
+        self.responses = defaultdict(int)
+
+
+class Registry:
+    """Метрики эндпоинтов в памяти процесса."""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.endpoints = defaultdict(EndpointMetrics)
+
+    def observe(self, request_metrics, status):
+        with self.lock:
+            metrics = self.endpoints[request_metrics.endpoint]
+            metrics.duration.observe(request_metrics.duration)
+            metrics.queries.observe(request_metrics.queries)
+            metrics.sql_seconds += request_metrics.sql_seconds
+            if request_metrics.serialize_seconds is not None:
+                metrics.serialize.observe(request_metrics.serialize_seconds)
+            metrics.render_seconds += request_metrics.render_seconds
+            metrics.responses[status] += 1
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus."""
+        with self.lock:
+            return '\n'.join(self._lines()) + '\n'
+
+    def _lines(self):
+        endpoints = sorted(self.endpoints.items())
+        families = (
+            ('request_duration_seconds', 'histogram',
+             'Время обработки запроса.',
+             lambda name, labels, metrics: metrics.duration.lines(
+                 name, labels)),
+            ('request_queries', 'histogram',
+             'Количество SQL-запросов на запрос.',
+             lambda name, labels, metrics: metrics.queries.lines(
+                 name, labels)),
+            ('serializer_duration_seconds', 'histogram',
+             'Время построения данных ответа сериализаторами.',
+             lambda name, labels, metrics: metrics.serialize.lines(
+                 name, labels)),
+            ('sql_duration_seconds_total', 'counter',
+             'Суммарное время SQL-запросов.',
+             lambda name, labels, metrics: [
+                 f'{name}{{{labels}}} {metrics.sql_seconds}']),
+            ('render_duration_seconds_total', 'counter',
+             'Суммарное время рендеринга данных в формат ответа.',
+             lambda name, labels, metrics: [
+                 f'{name}{{{labels}}} {metrics.render_seconds}']),
+            ('responses_total', 'counter',
+             'Количество ответов по статусу.',
+             lambda name, labels, metrics: [
+                 f'{name}{{{labels},status="{status}"}} {count}'
+                 for status, count in sorted(metrics.responses.items())]),
+        )
+        for suffix, kind, help_text, lines in families:
+            name = f'{PREFIX}_{suffix}'
+            yield f'# HELP {name} {help_text}'
+            yield f'# TYPE {name} {kind}'
+            for endpoint, metrics in endpoints:
+                yield from lines(
+                    name, f'endpoint="{escape(endpoint)}"', metrics)
+        yield from pool_lines()
+
+
+POOL_FAMILIES = (
+    ('db_pool_size', 'gauge', 'Размер пула соединений.', 'size'),
+    ('db_pool_in_use', 'gauge', 'Выданные из пула соединения.', 'in_use'),
+    ('db_pool_idle', 'gauge', 'Простаивающие соединения пула.', 'idle'),
+    ('db_pool_checkouts_total', 'counter',
+     'Количество выдач соединения из пула.', 'checkouts'),
+    ('db_pool_waits_total', 'counter',
+     'Количество ожиданий свободного соединения.', 'waits'),
+    ('db_pool_wait_seconds_total', 'counter',
+     'Суммарное время ожидания свободного соединения.', 'wait_seconds'),
+    ('db_pool_timeouts_total', 'counter',
+     'Количество отказов по таймауту ожидания.', 'timeouts'),
+    ('db_pool_opened_total', 'counter',
+     'Количество открытых соединений.', 'opened'),
+    ('db_pool_closed_total', 'counter',
+     'Количество закрытых соединений.', 'closed'),
+)
+
+
+def pool_lines():
+    """Метрики пулов соединений с базой текущего процесса."""
+    stats = sorted(
+        (alias, pool.stats()) for alias, pool in get_pools().items())
+    if not stats:
+        return
+    for suffix, kind, help_text, key in POOL_FAMILIES:
+        name = f'{PREFIX}_{suffix}'
+        yield f'# HELP {name} {help_text}'
+        yield f'# TYPE {name} {kind}'
+        for alias, values in stats:
+            yield f'{name}{{alias="{escape(alias)}"}} {values[key]}'
+
+
+def escape(value):
+    return (value.replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+registry = Registry()
+
+
+class RequestMetrics:
+    """Счётчики одного запроса; экземпляр служит обёрткой execute."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.endpoint = 'unresolved'
+        self.query_budget = settings.QUERY_BUDGET
+        self.queries = 0
+        self.sql_seconds = 0
+        self.serialize_seconds = None
+        self.render_seconds = 0
+        self.render_start = None
+        self.duration = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - started
+            self.queries += 1
+
+    @contextmanager
+    def serializing(self):
+        """Замер работы сериализатора: serializer.data и подобного."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.serialize_seconds = (
+                (self.serialize_seconds or 0)
+                + time.perf_counter() - started)
+
+    @contextmanager
+    def rendering(self):
+        """Замер рендеринга вне TemplateResponse, например в потоке."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.render_seconds += time.perf_counter() - started
+
+    def render_started(self):
+        self.render_start = time.perf_counter()
+
+    def render_finished(self, response):
+        self.render_seconds += time.perf_counter() - self.render_start
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+    def check_budget(self):
+        if self.query_budget is not None and self.queries > self.query_budget:
+            raise QueryBudgetExceeded(
+                f'{self.endpoint}: {self.queries} SQL-запросов '
+                f'при бюджете {self.query_budget}.'
+            )
+
+
+def serializing(request):
+    """Замер сериализатора в метриках запроса, если они ведутся."""
+    metrics = getattr(request, 'metrics', None)
+    return metrics.serializing() if metrics else nullcontext()
+
+
+def rendering(request):
+    metrics = getattr(request, 'metrics', None)
+    return metrics.rendering() if metrics else nullcontext()
+
+
+def get_endpoint(view_func, method):
+    """Имя эндпоинта: класс вью и действие вьюсета или метод."""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f'{view_class.__name__}.{action}'
@@ -0,0 +1,62 @@
+from django.db import connection
+
+from .metrics import RequestMetrics, get_endpoint, registry
+
+
+class MetricsMiddleware:
+    """Время ответа, SQL-запросы, время сериализаторов и рендеринга
+    по эндпоинтам.
+
+    Для потоковых ответов измерение заканчивается, когда отдано всё
+    содержимое, поэтому запросы внутри генератора тоже учитываются.
+    С настройкой QUERY_BUDGET запрос, превысивший бюджет SQL-запросов,
+    завершается исключением QueryBudgetExceeded. Время сериализаторов
+    замеряют вьюсеты (SerializationMetricsMixin).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        request.metrics = metrics
+        wrapper = connection.execute_wrapper(metrics)
+        wrapper.__enter__()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            wrapper.__exit__(None, None, None)
+            raise
+        if response.streaming:
+            response.streaming_content = self.stream(
+                response.streaming_content, metrics, wrapper,
+                response.status_code)
+            return response
+        self.finish(metrics, wrapper, response.status_code)
+        return response
+
+    def stream(self, content, metrics, wrapper, status):
+        try:
+            yield from content
+        finally:
+            self.finish(metrics, wrapper, status)
+
+    @staticmethod
+    def finish(metrics, wrapper, status):
+        wrapper.__exit__(None, None, None)
+        metrics.finish()
+        registry.observe(metrics, status)
+        metrics.check_budget()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = request.metrics
+        metrics.endpoint = get_endpoint(view_func, request.method)
+        view_class = getattr(view_func, 'cls', None)
+        budget = getattr(view_class, 'query_budget', None)
+        if budget is not None and metrics.query_budget is not None:
+            metrics.query_budget = budget
+
+    def process_template_response(self, request, response):
+        request.metrics.render_started()
+        response.add_post_render_callback(request.metrics.render_finished)
+        return response
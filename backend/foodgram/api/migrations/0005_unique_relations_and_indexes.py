@@ -0,0 +1,68 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:22
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+MAX_AMOUNT = 32767
+
+
+def duplicates(model, fields):
+    return (
+        model.objects
+        .values(*fields)
+        .annotate(keep=Min('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+
+
+def remove_duplicates(apps, schema_editor):
+    for name, fields in (('Favorite', ('user', 'recipe')),
+                         ('Cart', ('user', 'recipe')),
+                         ('TagRecipe', ('recipe', 'tag'))):
+        model = apps.get_model('api', name)
+        for row in duplicates(model, fields):
+            model.objects.filter(
+                **{field: row[field] for field in fields}
+            ).exclude(pk=row['keep']).delete()
+    IngredientAmount = apps.get_model('api', 'IngredientAmount')
+    for row in duplicates(IngredientAmount, ('recipe', 'ingredient')):
+        rows = IngredientAmount.objects.filter(
+            recipe=row['recipe'], ingredient=row['ingredient'])
+        amount = rows.aggregate(amount=Sum('amount'))['amount']
+        rows.filter(pk=row['keep']).update(amount=min(amount, MAX_AMOUNT))
+        rows.exclude(pk=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_recipe_image_variants_ready'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-pub_date', '-id'], name='recipe_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date'], name='recipe_author_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='cart',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_cart'),
+        ),
+        migrations.AddConstraint(
+            model_name='favorite',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_favorite'),
+        ),
+        migrations.AddConstraint(
+            model_name='ingredientamount',
+            constraint=models.UniqueConstraint(fields=('recipe', 'ingredient'), name='unique_recipe_ingredient'),
+        ),
+        migrations.AddConstraint(
+            model_name='tagrecipe',
+            constraint=models.UniqueConstraint(fields=('recipe', 'tag'), name='unique_recipe_tag'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:27
+
+from collections import defaultdict
+
+import api.models
+from django.db import migrations
+
+
+def fill_tags_mask(apps, schema_editor):
+    """Маски тегов для уже существующих рецептов."""
+    Recipe = apps.get_model('api', 'Recipe')
+    TagRecipe = apps.get_model('api', 'TagRecipe')
+    masks = defaultdict(int)
+    for recipe_id, tag_id in TagRecipe.objects.values_list(
+            'recipe_id', 'tag_id').iterator():
+        masks[recipe_id] |= api.models.tag_bit(tag_id)
+    recipes = defaultdict(list)
+    for recipe_id, mask in masks.items():
+        if mask:
+            recipes[mask].append(recipe_id)
+    for mask, ids in recipes.items():
+        for start in range(0, len(ids), 500):
+            Recipe.objects.filter(pk__in=ids[start:start + 500]).update(
+                tags_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_unique_relations_and_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='tags_mask',
+            field=api.models.BitMaskField(default=0, editable=False, verbose_name='Маска тегов'),
+        ),
+        migrations.RunPython(fill_tags_mask, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,97 @@
+from django.db import migrations
+
+POSTGRES_FORWARD = (
+    'ALTER TABLE api_recipe ADD COLUMN search_vector tsvector',
+    '''
+    CREATE FUNCTION api_recipe_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A')
+            || setweight(to_tsvector('russian', coalesce(NEW.text, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    ''',
+    '''
+    CREATE TRIGGER api_recipe_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, text ON api_recipe
+    FOR EACH ROW EXECUTE PROCEDURE api_recipe_search_vector()
+    ''',
+    'UPDATE api_recipe SET name = name',
+    'CREATE INDEX api_recipe_search_idx ON api_recipe '
+    'USING GIN (search_vector)',
+)
+
+POSTGRES_BACKWARD = (
+    'DROP TRIGGER api_recipe_search_vector_update ON api_recipe',
+    'DROP FUNCTION api_recipe_search_vector()',
+    'ALTER TABLE api_recipe DROP COLUMN search_vector',
+)
+
+SQLITE_FORWARD = (
+    '''
+    CREATE VIRTUAL TABLE api_recipe_search USING fts5(
+        name, text, content='api_recipe', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    ''',
+    '''
+    CREATE TRIGGER api_recipe_search_insert AFTER INSERT ON api_recipe BEGIN
+        INSERT INTO api_recipe_search(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    ''',
+    '''
+    CREATE TRIGGER api_recipe_search_delete AFTER DELETE ON api_recipe BEGIN
+        INSERT INTO api_recipe_search(api_recipe_search, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+    END
+    ''',
+    '''
+    CREATE TRIGGER api_recipe_search_update
+    AFTER UPDATE OF name, text ON api_recipe BEGIN
+        INSERT INTO api_recipe_search(api_recipe_search, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+        INSERT INTO api_recipe_search(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    ''',
+    "INSERT INTO api_recipe_search(api_recipe_search) VALUES ('rebuild')",
+)
+
+SQLITE_BACKWARD = (
+    'DROP TRIGGER api_recipe_search_insert',
+    'DROP TRIGGER api_recipe_search_delete',
+    'DROP TRIGGER api_recipe_search_update',
+    'DROP TABLE api_recipe_search',
+)
+
+STATEMENTS = {
+    'postgresql': (POSTGRES_FORWARD, POSTGRES_BACKWARD),
+    'sqlite': (SQLITE_FORWARD, SQLITE_BACKWARD),
+}
+
+
+def run(statements):
+    def execute(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in STATEMENTS.get(vendor, ((), ()))[statements]:
+            schema_editor.execute(sql)
+    return execute
+
+
+class Migration(migrations.Migration):
+    """Полнотекстовый индекс рецептов по названию и описанию.
+
+    Индекс поддерживается триггерами базы, поэтому обновляется и при
+    массовой загрузке. Поле не описано в модели: в Postgres это колонка
+    tsvector с GIN-индексом, в SQLite — отдельная таблица FTS5.
+    """
+
+    dependencies = [
+        ('api', '0006_recipe_tags_mask'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(0), run(1)),
+    ]
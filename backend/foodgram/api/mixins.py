@@ -0,0 +1,158 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .metrics import rendering, serializing
+from .versions import get_version
+
+
+class CachedReadMixin:
+    """Кэширование ответов list/retrieve справочных данных.
+
+    Ключ кэша и ETag строятся из версии набора данных, адреса запроса
+    и формата ответа, поэтому при совпадении If-None-Match ответ 304
+    отдаётся без обращения к базе. Потоковый ответ передаётся клиенту
+    по мере формирования, а в кэш попадает его готовое тело.
+    """
+
+    cache_version_name = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def get_cache_key(self, request):
+        version = get_version(self.cache_version_name)
+        path = md5(request.get_full_path().encode()).hexdigest()
+        return (f'response:{self.cache_version_name}:{version}:'
+                f'{request.accepted_renderer.format}:{path}')
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        etag = f'"{md5(key.encode()).hexdigest()}"'
+        if etag in (request.META.get('HTTP_IF_NONE_MATCH') or ''):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            data = cache.get(key)
+            if data is None:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                if response.streaming:
+                    response.streaming_content = self.cache_stream(
+                        key, response.streaming_content)
+                else:
+                    cache.set(key, response.data,
+                              settings.REFERENCE_DATA_CACHE_TIMEOUT)
+            elif isinstance(data, bytes):
+                response = HttpResponse(
+                    data, content_type=request.accepted_renderer.media_type)
+            else:
+                response = Response(data)
+        response['ETag'] = etag
+        patch_cache_control(
+            response, public=True,
+            max_age=settings.REFERENCE_DATA_MAX_AGE)
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+    @staticmethod
+    def cache_stream(key, content):
+        """Отдача потока с сохранением тела в кэш после последней части.
+
+        Если клиент оборвал соединение, неполное тело не сохраняется.
+        """
+        chunks = []
+        for chunk in content:
+            chunks.append(chunk)
+            yield chunk
+        cache.set(key, b''.join(chunks),
+                  settings.REFERENCE_DATA_CACHE_TIMEOUT)
+
+
+class SerializationMetricsMixin:
+    """list и retrieve с замером времени сериализатора.
+
+    serializer.data строится внутри вью, поэтому рендерингом в
+    MetricsMiddleware не учитывается; собственные действия вьюсета
+    передают сериализатор в serialize сами.
+    """
+
+    def serialize(self, serializer):
+        with serializing(self.request):
+            return serializer.data
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                self.serialize(self.get_serializer(page, many=True)))
+        return Response(
+            self.serialize(self.get_serializer(queryset, many=True)))
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(
+            self.serialize(self.get_serializer(self.get_object())))
+
+
+class StreamingListMixin(SerializationMetricsMixin):
+    """Потоковая выдача списка, если пагинация к запросу не применяется.
+
+    Queryset читается через iterator() пачками по stream_chunk_size,
+    каждая пачка сериализуется и отдаётся клиенту сразу, поэтому память
+    воркера не растёт вместе с таблицей. Результат побайтно совпадает
+    с обычным ответом JSONRenderer. Другие форматы (например, Browsable
+    API) и пагинированные запросы обрабатываются как обычно.
+    """
+
+    stream_chunk_size = 500
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                self.serialize(self.get_serializer(page, many=True)))
+        renderer = request.accepted_renderer
+        if not isinstance(renderer, JSONRenderer):
+            return Response(
+                self.serialize(self.get_serializer(queryset, many=True)))
+        return StreamingHttpResponse(
+            self.stream(queryset, renderer),
+            content_type=renderer.media_type
+        )
+
+    def stream(self, queryset, renderer):
+        # Один сериализатор на весь ответ: новые сериализаторы на каждую
+        # пачку образуют циклы ссылок и живут до полной сборки мусора.
+        serializer = self.get_serializer(many=True)
+        separator = b''
+        yield b'['
+        chunk = []
+        for obj in queryset.iterator(chunk_size=self.stream_chunk_size):
+            chunk.append(obj)
+            if len(chunk) == self.stream_chunk_size:
+                yield separator + self.render_chunk(
+                    serializer, chunk, renderer)
+                separator = b','
+                chunk = []
+        if chunk:
+            yield separator + self.render_chunk(serializer, chunk, renderer)
+        yield b']'
+
+    def render_chunk(self, serializer, chunk, renderer):
+        """Элементы пачки в JSON без квадратных скобок массива."""
+        with serializing(self.request):
+            data = serializer.to_representation(chunk)
+        with rendering(self.request):
+            return renderer.render(data)[1:-1]
@@ -3,7 +3,25 @@ from colorfield.fields import ColorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
-from users.models import User
+from users.models import CounterFieldsMixin, User
+
+TAG_MASK_BITS = 63
+
+
+class BitMaskField(models.BigIntegerField):
+    """Битовая маска в целом поле со сравнением anybits."""
+
+
+@BitMaskField.register_lookup
+class AnyBits(models.Lookup):
+    """Есть хотя бы один общий установленный бит с маской."""
+
+    lookup_name = 'anybits'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'({lhs} & {rhs}) <> 0', lhs_params + rhs_params
 
 
 class Tag(models.Model):
@@ -47,12 +65,18 @@ class Ingredient(models.Model):
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Recipe(models.Model):
+class Recipe(CounterFieldsMixin, models.Model):
     """Модель рецептов."""
 
     name = models.CharField(
@@ -72,6 +96,16 @@ class Recipe(models.Model):
         upload_to='recipe/image/',
         verbose_name='Картинка'
     )
+    image_variants_ready = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Уменьшенные копии картинки готовы'
+    )
+    tags_mask = BitMaskField(
+        default=0,
+        editable=False,
+        verbose_name='Маска тегов'
+    )
     cooking_time = models.PositiveSmallIntegerField(
         verbose_name='Время приготовления',
         validators=[
@@ -95,16 +129,52 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сколько раз добавлен в избранное'
+    )
+    carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сколько раз добавлен в список покупок'
+    )
+
+    counter_fields = ('favorites_count', 'carts_count')
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date', )
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
+def tag_bit(tag_id):
+    """Бит тега в маске; у тегов с id больше TAG_MASK_BITS бита нет."""
+    if 0 < tag_id <= TAG_MASK_BITS:
+        return 1 << (tag_id - 1)
+    return 0
+
+
+def get_tags_mask(tag_ids):
+    mask = 0
+    for tag_id in tag_ids:
+        mask |= tag_bit(tag_id)
+    return mask
+
+
 class IngredientAmount(models.Model):
     """Вспомогательная модель ингредиентов и их количества."""
 
@@ -129,6 +199,12 @@ class IngredientAmount(models.Model):
     class Meta:
         verbose_name = 'Ингредиент рецепта'
         verbose_name_plural = 'Ингредиенты рецептов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'ingredient'],
+                name='unique_recipe_ingredient'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.amount} {self.ingredient}'
@@ -153,6 +229,12 @@ class TagRecipe(models.Model):
     class Meta:
         verbose_name = 'Тэг рецепта'
         verbose_name_plural = 'Тэги рецептов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'tag'],
+                name='unique_recipe_tag'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.recipe} {self.tag}'
@@ -173,10 +255,21 @@ class Favorite(models.Model):
         related_name='favorite',
         verbose_name='Рецепт'
     )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата добавления'
+    )
 
     class Meta:
         verbose_name = 'Избранный рецепт'
         verbose_name_plural = 'Избранные рецепты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_favorite'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.user} {self.recipe}'
@@ -201,6 +294,99 @@ class Cart(models.Model):
     class Meta:
         verbose_name = 'Корзина покупок'
         verbose_name_plural = 'Корзины покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_cart'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} {self.recipe}'
+
+
+class RecipeRecommendation(models.Model):
+    """Похожие рецепты по совместному добавлению в избранное."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Рецепт'
+    )
+    recommended = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='recommended_for',
+        verbose_name='Рекомендуемый рецепт'
+    )
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'recommended'],
+                name='unique_recommendation'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} {self.recommended}'
+
+
+class MaterializedFeed(models.Model):
+    """Пользователь, чья лента подписок хранится в FeedEntry."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='materialized_feed',
+        verbose_name='Пользователь'
+    )
+
+    class Meta:
+        verbose_name = 'Материализованная лента'
+        verbose_name_plural = 'Материализованные ленты'
+
+    def __str__(self):
+        return f'{self.user}'
+
+
+class FeedEntry(models.Model):
+    """Рецепт в материализованной ленте подписок пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пользователь'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='feed_entry_user_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.user} {self.recipe}'
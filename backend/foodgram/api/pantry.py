@@ -0,0 +1,182 @@
+import heapq
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from operator import neg, sub, truediv
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import IngredientAmount
+
+SEQUENCE_KEY = 'pantry:sequence'
+CHANGE_KEY = 'pantry:change:{}'
+RECORD_ATTEMPTS = 3
+
+_index = None
+_lock = Lock()
+
+
+def new_sequence():
+    return int(time.time() * 1000)
+
+
+def get_sequence():
+    """Номер последнего изменения состава рецептов, общий для процессов.
+
+    Начинается с метки времени, как версии в versions.py: после
+    потери ключа номер не совпадёт ни с одним построенным индексом.
+    """
+    sequence = cache.get(SEQUENCE_KEY)
+    if sequence is None:
+        cache.add(SEQUENCE_KEY, new_sequence(), timeout=None)
+        sequence = cache.get(SEQUENCE_KEY)
+    return sequence
+
+
+def record_changes(recipe_ids):
+    """Запись в журнал рецептов, у которых изменился набор ингредиентов.
+
+    Запись делается после фиксации транзакции, чтобы процессы,
+    применяющие журнал, читали уже новые данные. incr у файлового кэша
+    не атомарен, поэтому запись журнала занимается через add: если
+    номер уже занят другим процессом, берётся следующий. Если записать
+    изменение не удалось, номер сбрасывается и индексы всех процессов
+    перестраиваются целиком.
+    """
+    recipe_ids = list(recipe_ids)
+
+    def record():
+        for _ in range(RECORD_ATTEMPTS):
+            get_sequence()
+            try:
+                sequence = cache.incr(SEQUENCE_KEY)
+            except ValueError:
+                continue
+            if cache.add(CHANGE_KEY.format(sequence), recipe_ids,
+                         timeout=settings.PANTRY_CHANGES_TIMEOUT):
+                return
+        cache.set(SEQUENCE_KEY, new_sequence(), timeout=None)
+
+    transaction.on_commit(record)
+
+
+class PantryIndex:
+    """Инвертированный индекс: ингредиент → отсортированный массив рецептов.
+
+    Для каждого рецепта хранится кортеж его ингредиентов, чтобы
+    изменения рецепта применялись без перестройки всего индекса.
+    """
+
+    def __init__(self, rows, sequence):
+        self.sequence = sequence
+        postings = defaultdict(list)
+        ingredients = defaultdict(list)
+        for recipe_id, ingredient_id in rows:
+            postings[ingredient_id].append(recipe_id)
+            ingredients[recipe_id].append(ingredient_id)
+        self.postings = {
+            ingredient_id: array('I', sorted(ids))
+            for ingredient_id, ids in postings.items()
+        }
+        self.recipes = {
+            recipe_id: tuple(ids) for recipe_id, ids in ingredients.items()
+        }
+
+    def remove(self, recipe_id):
+        for ingredient_id in self.recipes.pop(recipe_id, ()):
+            ids = self.postings[ingredient_id]
+            position = bisect_left(ids, recipe_id)
+            if position < len(ids) and ids[position] == recipe_id:
+                del ids[position]
+
+    def add(self, recipe_id, ingredient_ids):
+        self.recipes[recipe_id] = tuple(ingredient_ids)
+        for ingredient_id in ingredient_ids:
+            insort(self.postings.setdefault(ingredient_id, array('I')),
+                   recipe_id)
+
+    def apply(self, recipe_ids, sequence):
+        """Перечитывание состава изменившихся рецептов."""
+        ingredients = defaultdict(list)
+        for recipe_id, ingredient_id in IngredientAmount.objects.filter(
+                recipe_id__in=recipe_ids).values_list(
+                'recipe_id', 'ingredient_id'):
+            ingredients[recipe_id].append(ingredient_id)
+        for recipe_id in recipe_ids:
+            self.remove(recipe_id)
+            if ingredients[recipe_id]:
+                self.add(recipe_id, ingredients[recipe_id])
+        self.sequence = sequence
+
+    def match(self, ingredient_ids, limit):
+        """Рецепты по убыванию доли имеющихся ингредиентов.
+
+        Возвращает кортежи (id рецепта, доля, число недостающих):
+        при равной доле выше рецепт с меньшим числом недостающих,
+        затем более новый. Ключи сортировки собираются через map и zip,
+        без цикла на Python по всем найденным рецептам.
+        """
+        hits = Counter()
+        for ingredient_id in set(ingredient_ids):
+            hits.update(self.postings.get(ingredient_id, ()))
+        recipe_ids = list(hits)
+        counts = list(hits.values())
+        sizes = list(map(len, map(self.recipes.__getitem__, recipe_ids)))
+        ranked = heapq.nsmallest(limit, zip(
+            map(truediv, sizes, counts),
+            map(sub, sizes, counts),
+            map(neg, recipe_ids),
+        ))
+        return [
+            (-recipe_id, 1 / ratio, missing)
+            for ratio, missing, recipe_id in ranked
+        ]
+
+
+def load_changes(since, sequence):
+    """Id рецептов из журнала или None, если журнал неполон."""
+    if sequence - since > settings.PANTRY_MAX_CHANGES:
+        return None
+    keys = [CHANGE_KEY.format(number)
+            for number in range(since + 1, sequence + 1)]
+    changes = cache.get_many(keys)
+    if len(changes) != len(keys):
+        return None
+    return {recipe_id for ids in changes.values() for recipe_id in ids}
+
+
+def build_index(sequence):
+    return PantryIndex(
+        IngredientAmount.objects.values_list(
+            'recipe_id', 'ingredient_id').iterator(),
+        sequence
+    )
+
+
+def get_pantry_index():
+    """Индекс, догоняющий журнал изменений или перестраиваемый целиком."""
+    global _index
+    sequence = get_sequence()
+    with _lock:
+        if _index is None or _index.sequence > sequence:
+            _index = build_index(sequence)
+        elif _index.sequence < sequence:
+            recipe_ids = load_changes(_index.sequence, sequence)
+            if recipe_ids is None:
+                _index = build_index(sequence)
+            else:
+                _index.apply(recipe_ids, sequence)
+        return _index
+
+
+def match_pantry(ingredient_ids, limit=None):
+    """Рецепты, которые можно приготовить из заданных ингредиентов."""
+    if limit is None:
+        limit = settings.PANTRY_MAX_RESULTS
+    index = get_pantry_index()
+    with _lock:
+        return index.match(ingredient_ids, limit)
@@ -0,0 +1,101 @@
+import heapq
+from collections import Counter
+from itertools import groupby
+from math import sqrt
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Favorite, RecipeRecommendation
+
+
+def iter_user_favorites():
+    """Избранное, сгруппированное по пользователям, одним проходом."""
+    rows = (
+        Favorite.objects.order_by('user_id', 'recipe_id')
+        .values_list('user_id', 'recipe_id').iterator()
+    )
+    for _, group in groupby(rows, key=lambda row: row[0]):
+        yield [recipe_id for _, recipe_id in group]
+
+
+def get_changed_recipes(since):
+    """Рецепты, чьи соседи могли измениться после добавлений в избранное.
+
+    У рецептов из новых записей избранного изменилась популярность,
+    поэтому меняется их сходство со всеми рецептами, которые хоть раз
+    добавляли в избранное вместе с ними.
+    """
+    recipes = Favorite.objects.filter(created__gte=since).values('recipe_id')
+    users = Favorite.objects.filter(recipe_id__in=recipes).values('user_id')
+    return set(
+        Favorite.objects.filter(user_id__in=users)
+        .values_list('recipe_id', flat=True).distinct()
+    )
+
+
+def compute_neighbours(targets=None, top_k=None):
+    """Косинусное сходство рецептов по матрице пользователь × рецепт.
+
+    Матрица хранится разреженно, строками избранного пользователей.
+    Совместные добавления считаются через Counter.update, то есть
+    циклом на C, только для строк рецептов из targets (или всех).
+    Возвращает словарь: рецепт → список (сходство, сосед).
+    """
+    if top_k is None:
+        top_k = settings.RECOMMENDATIONS_TOP_K
+    max_favorites = settings.RECOMMENDATIONS_MAX_USER_FAVORITES
+    popularity = Counter()
+    common = {}
+    for recipes in iter_user_favorites():
+        popularity.update(recipes)
+        if len(recipes) < 2 or len(recipes) > max_favorites:
+            continue
+        for recipe_id in recipes:
+            if targets is None or recipe_id in targets:
+                common.setdefault(recipe_id, Counter()).update(recipes)
+    neighbours = {}
+    for recipe_id, counts in common.items():
+        del counts[recipe_id]
+        norm = sqrt(popularity[recipe_id])
+        neighbours[recipe_id] = heapq.nlargest(top_k, (
+            (count / (norm * sqrt(popularity[other])), other)
+            for other, count in counts.items()
+        ))
+    return neighbours
+
+
+def save_neighbours(targets, neighbours, batch_size=500):
+    """Замена сохранённых рекомендаций для рецептов из targets."""
+    targets = list(targets)
+    for start in range(0, len(targets), batch_size):
+        batch = targets[start:start + batch_size]
+        with transaction.atomic():
+            RecipeRecommendation.objects.filter(recipe_id__in=batch).delete()
+            RecipeRecommendation.objects.bulk_create(
+                RecipeRecommendation(
+                    recipe_id=recipe_id, recommended_id=other, score=score)
+                for recipe_id in batch
+                for score, other in neighbours.get(recipe_id, ())
+            )
+
+
+def build_recommendations(since=None):
+    """Пересчёт рекомендаций: всех или затронутых избранным после since.
+
+    Возвращает число пересчитанных рецептов.
+    """
+    if since is None:
+        targets = None
+    else:
+        targets = get_changed_recipes(since)
+        if not targets:
+            return 0
+    neighbours = compute_neighbours(targets)
+    if targets is None:
+        targets = set(neighbours).union(
+            RecipeRecommendation.objects.values_list(
+                'recipe_id', flat=True).distinct()
+        )
+    save_neighbours(targets, neighbours)
+    return len(targets)
@@ -0,0 +1,54 @@
+from django.utils.functional import cached_property
+
+from users.models import Follow
+
+from .models import Cart, Favorite
+
+
+class UserRelations:
+    """Подписки, избранное и корзина пользователя в виде множеств id.
+
+    Каждое множество загружается одним запросом при первом обращении
+    и дальше отвечает на проверки без обращения к базе.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    def _load(self, queryset, field):
+        if not self.user.is_authenticated:
+            return frozenset()
+        return frozenset(
+            queryset.filter(user=self.user).values_list(field, flat=True)
+        )
+
+    @cached_property
+    def following(self):
+        return self._load(Follow.objects, 'author_id')
+
+    @cached_property
+    def favorites(self):
+        return self._load(Favorite.objects, 'recipe_id')
+
+    @cached_property
+    def cart(self):
+        return self._load(Cart.objects, 'recipe_id')
+
+    def is_subscribed(self, author):
+        return author.pk in self.following
+
+    def is_favorited(self, recipe):
+        return recipe.pk in self.favorites
+
+    def is_in_shopping_cart(self, recipe):
+        return recipe.pk in self.cart
+
+
+def get_relations(request):
+    """Кэш связей текущего пользователя на время одного запроса."""
+    http_request = getattr(request, '_request', request)
+    relations = getattr(http_request, 'user_relations', None)
+    if relations is None or relations.user != request.user:
+        relations = UserRelations(request.user)
+        http_request.user_relations = relations
+    return relations
@@ -0,0 +1,124 @@
+import csv
+import json
+
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class Echo:
+    """Псевдо-буфер для потоковой записи csv."""
+
+    def write(self, value):
+        return value
+
+
+class PlainRenderer(renderers.BaseRenderer):
+    """Базовый рендерер для ответов об ошибках в текстовых форматах."""
+
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            data = '\n'.join(f'{key}: {value}' for key, value in data.items())
+        return str(data).encode(self.charset)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer на orjson с тем же результатом побайтно.
+
+    Даты, Decimal и ленивые строки сериализуются кодировщиком DRF,
+    U+2028 и U+2029 экранируются, как в JSONRenderer. Без orjson, при
+    отступах, в режиме ASCII и для того, что orjson не умеет (числа
+    больше 64 бит, одиночные суррогаты), работает обычный JSONRenderer.
+    """
+
+    options = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+        if orjson else 0
+    )
+    default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type,
+                                   renderer_context or {}) is not None):
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        try:
+            ret = orjson.dumps(
+                data, default=self.default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        return (ret.replace(b'\xe2\x80\xa8', b'\\u2028')
+                .replace(b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class PrometheusRenderer(PlainRenderer):
+    """Метрики в текстовом формате Prometheus."""
+
+    media_type = 'text/plain'
+    format = 'prometheus'
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class ShoppingListTextRenderer(PlainRenderer):
+    """Список покупок в виде простого текста."""
+
+    media_type = 'text/plain'
+    format = 'txt'
+    filename = 'shopping_list.txt'
+
+    def stream(self, rows):
+        yield 'Список покупок:\n'
+        for row in rows:
+            yield (f'\n{row["name"]} ({row["measurement_unit"]}) '
+                   f'= {row["amount"]}')
+
+
+class ShoppingListCSVRenderer(PlainRenderer):
+    """Список покупок в формате csv."""
+
+    media_type = 'text/csv'
+    format = 'csv'
+    filename = 'shopping_list.csv'
+
+    def stream(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(('name', 'measurement_unit', 'amount'))
+        for row in rows:
+            yield writer.writerow(
+                (row['name'], row['measurement_unit'], row['amount'])
+            )
+
+
+class NDJSONRenderer(PlainRenderer):
+    """Выгрузка рецептов, по одному json-объекту в строке."""
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    filename = 'recipes.ndjson'
+
+
+class ShoppingListJSONRenderer(renderers.JSONRenderer):
+    """Список покупок в формате json."""
+
+    filename = 'shopping_list.json'
+
+    def stream(self, rows):
+        separator = ''
+        yield '['
+        for row in rows:
+            yield separator + json.dumps(
+                row, ensure_ascii=False, separators=(',', ':'))
+            separator = ','
+        yield ']'
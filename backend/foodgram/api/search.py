@@ -0,0 +1,99 @@
+from django.db import connection, connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+POSTGRES_QUERY = "websearch_to_tsquery('russian', %s)"
+POSTGRES_MATCH = f'api_recipe.search_vector @@ {POSTGRES_QUERY}'
+POSTGRES_RANK = f'ts_rank(api_recipe.search_vector, {POSTGRES_QUERY})'
+
+SQLITE_MATCH = (
+    'api_recipe.id IN (SELECT rowid FROM api_recipe_search '
+    'WHERE api_recipe_search MATCH %s)'
+)
+SQLITE_RANK = (
+    'SELECT -bm25(api_recipe_search, 2.0, 1.0) FROM api_recipe_search '
+    'WHERE api_recipe_search MATCH %s AND rowid = api_recipe.id'
+)
+
+SQLITE_TRIGGERS = {
+    'api_recipe_search_insert': '''
+    CREATE TRIGGER api_recipe_search_insert AFTER INSERT ON api_recipe BEGIN
+        INSERT INTO api_recipe_search(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    ''',
+    'api_recipe_search_delete': '''
+    CREATE TRIGGER api_recipe_search_delete AFTER DELETE ON api_recipe BEGIN
+        INSERT INTO api_recipe_search(api_recipe_search, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+    END
+    ''',
+    'api_recipe_search_update': '''
+    CREATE TRIGGER api_recipe_search_update
+    AFTER UPDATE OF name, text ON api_recipe BEGIN
+        INSERT INTO api_recipe_search(api_recipe_search, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+        INSERT INTO api_recipe_search(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    ''',
+}
+
+
+def restore_search_triggers(using='default', **kwargs):
+    """Возвращает триггеры FTS5 после миграций.
+
+    SQLite меняет схему api_recipe пересозданием таблицы, и триггеры
+    из миграции 0007 при этом пропадают. Обработчик post_migrate
+    создаёт недостающие и перестраивает индекс.
+    """
+    if connections[using].vendor != 'sqlite':
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            'SELECT name FROM sqlite_master WHERE name LIKE %s',
+            ['api_recipe_search%']
+        )
+        existing = {name for name, in cursor.fetchall()}
+        if 'api_recipe_search' not in existing:
+            return
+        missing = SQLITE_TRIGGERS.keys() - existing
+        for name in sorted(missing):
+            cursor.execute(SQLITE_TRIGGERS[name])
+        if missing:
+            cursor.execute(
+                "INSERT INTO api_recipe_search(api_recipe_search) "
+                "VALUES ('rebuild')"
+            )
+
+
+def fts_query(text):
+    """Запрос FTS5: все слова как префиксы, спецсимволы экранированы."""
+    words = [word.replace('"', '""') for word in text.split()]
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_recipes(queryset, text):
+    """Рецепты, подходящие под поисковый запрос, по убыванию релевантности.
+
+    При курсорной пагинации порядок задаётся курсором, а не релевантностью.
+    """
+    text = text.strip()
+    if not text:
+        return queryset
+    if connection.vendor == 'postgresql':
+        match, rank, params = POSTGRES_MATCH, POSTGRES_RANK, [text]
+    elif connection.vendor == 'sqlite':
+        match, rank = SQLITE_MATCH, f'({SQLITE_RANK})'
+        params = [fts_query(text)]
+    else:
+        return queryset.filter(name__icontains=text)
+    return (
+        queryset
+        .annotate(
+            search_match=RawSQL(match, params, output_field=BooleanField()),
+            search_rank=RawSQL(rank, params, output_field=FloatField()),
+        )
+        .filter(search_match=True)
+        .order_by('-search_rank', *queryset.model._meta.ordering, '-id')
+    )
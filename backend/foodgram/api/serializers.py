@@ -2,14 +2,20 @@ from drf_extra_fields.fields import Base64ImageField
 from djoser.serializers import UserSerializer
 
 from django.conf import settings
-from django.shortcuts import get_object_or_404
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models, transaction
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 
-from users.models import User, Follow
+from users.models import User
 from users.serializers import MyUserSerializer
 
-from .models import (Cart, Favorite, Ingredient, IngredientAmount, Recipe, Tag,
-                     TagRecipe)
+from .images import variant_urls
+from .models import (Ingredient, IngredientAmount, Recipe, Tag, TagRecipe,
+                     get_tags_mask)
+from .pantry import record_changes
+from .relations import get_relations
+from .representations import represent_recipes
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -42,11 +48,13 @@ class IngredientAmountSerializer(serializers.ModelSerializer):
 
 
 class IngredientAmountCreateSerializer(serializers.ModelSerializer):
-    """Сериализатор количества ингредиентов при создании рецепта."""
+    """Сериализатор количества ингредиентов при создании рецепта.
 
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all()
-    )
+    Ингредиенты по id загружаются одним запросом в
+    RecipeCreateSerializer.validate_ingredients.
+    """
+
+    id = serializers.IntegerField()
     amount = serializers.IntegerField()
 
     class Meta:
@@ -54,7 +62,71 @@ class IngredientAmountCreateSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
-class RecipeCreateSerializer(serializers.ModelSerializer):
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """Список связанных объектов, загружаемых одним запросом."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        queryset = self.child_relation.get_queryset()
+        try:
+            ids = [queryset.model._meta.pk.to_python(pk) for pk in data]
+        except DjangoValidationError:
+            self.child_relation.fail('incorrect_type', data_type='str')
+        objects = queryset.in_bulk(ids)
+        for pk in ids:
+            if pk not in objects:
+                self.child_relation.fail('does_not_exist', pk_value=pk)
+        return [objects[pk] for pk in ids]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField, который при many=True делает один запрос."""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+
+class RecipeFlagsMixin:
+    """Флаги избранного и корзины из кэша связей текущего запроса."""
+
+    def get_is_favorited(self, obj):
+        """Определение избранных рецептов."""
+        return get_relations(self.context['request']).is_favorited(obj)
+
+    def get_is_in_shopping_cart(self, obj):
+        """Определение рецептов для покупки."""
+        return get_relations(
+            self.context['request']).is_in_shopping_cart(obj)
+
+
+class ImageVariantsMixin:
+    """Адреса уменьшенных копий картинки рецепта."""
+
+    def get_image_variants(self, obj):
+        variants = variant_urls(obj)
+        request = self.context.get('request')
+        if variants and request is not None:
+            return absolute_variant_urls(variants, request)
+        return variants
+
+
+def absolute_variant_urls(variants, request):
+    return {
+        size: {extension: request.build_absolute_uri(url)
+               for extension, url in urls.items()}
+        for size, urls in variants.items()
+    }
+
+
+class RecipeCreateSerializer(RecipeFlagsMixin, serializers.ModelSerializer):
     """Сериализатор для создания рецепта."""
 
     image = Base64ImageField()
@@ -63,7 +135,7 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         source='ingredientamount_set',
         many=True
     )
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = BulkPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
     )
@@ -76,30 +148,20 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
                   'tags', 'cooking_time', 'is_favorited',
                   'is_in_shopping_cart')
 
-    def get_is_favorited(self, obj):
-        """Определение избранных рецептов."""
-        username = self.context['request'].user
-        user = get_object_or_404(User, username=username)
-        return (username.is_authenticated
-                and Favorite.objects.filter(user=user, recipe=obj).exists())
-
-    def get_is_in_shopping_cart(self, obj):
-        """Определение рецептов для покупки."""
-        username = self.context['request'].user
-        user = get_object_or_404(User, username=username)
-        return (username.is_authenticated
-                and Cart.objects.filter(user=user, recipe=obj).exists())
-
     def validate_ingredients(self, value):
         """Метод валидации ингредиентов в рецепте."""
-        ingredients_list = []
-        ingredients = value
-        if len(ingredients) == 0:
+        if len(value) == 0:
             raise serializers.ValidationError(
                 'Без ингредиентов нельзя!')
-        for ingredient in ingredients:
-            check_object = ingredient.get('id')
-            check_amount = ingredient.get('amount')
+        ingredients = Ingredient.objects.in_bulk(
+            [ingredient['id'] for ingredient in value])
+        ingredients_list = []
+        for ingredient in value:
+            check_object = ingredient['id']
+            check_amount = ingredient['amount']
+            if check_object not in ingredients:
+                raise serializers.ValidationError(
+                    f'Ингредиента {check_object} не существует!')
             if (check_amount > settings.MAX_AMOUNT_INGREDIENT
                or check_amount < settings.MIN_AMOUNT_INGREDIENT):
                 raise serializers.ValidationError(
@@ -108,114 +170,181 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError(
                     'Продукты в рецепте повторяются!')
             ingredients_list.append(check_object)
+            ingredient['id'] = ingredients[check_object]
         return value
 
     def validate_tags(self, value):
         """Метод валидации тегов в рецепте."""
-        tags_list = []
-        tags = value
-        if len(tags) == 0:
+        if len(value) == 0:
             raise serializers.ValidationError(
                 'Без тегов нельзя!')
-        for tag in tags:
-            tag_to_check = get_object_or_404(Ingredient, id=tag.id)
-            if tag_to_check in tags_list:
-                raise serializers.ValidationError(
-                    'Данный тэг уже есть в рецепте!')
-            tags_list.append(tag_to_check)
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError(
+                'Данный тэг уже есть в рецепте!')
         return value
 
+    @staticmethod
+    def set_tags(recipe, tags):
+        """Добавление и удаление только изменившихся тегов рецепта."""
+        current = set(
+            TagRecipe.objects.filter(recipe=recipe)
+            .values_list('tag_id', flat=True)
+        )
+        new = {tag.pk for tag in tags}
+        if current - new:
+            TagRecipe.objects.filter(
+                recipe=recipe, tag_id__in=current - new).delete()
+        TagRecipe.objects.bulk_create(
+            TagRecipe(recipe=recipe, tag_id=pk) for pk in new - current)
+        recipe.tags_mask = get_tags_mask(new)
+        Recipe.objects.filter(pk=recipe.pk).update(tags_mask=recipe.tags_mask)
+
+    @staticmethod
+    def set_ingredients(recipe, ingredients):
+        """Изменение только отличающихся ингредиентов рецепта."""
+        current = {
+            row.ingredient_id: row
+            for row in IngredientAmount.objects.filter(recipe=recipe)
+        }
+        new = {
+            ingredient['id'].pk: ingredient['amount']
+            for ingredient in ingredients
+        }
+        removed = current.keys() - new.keys()
+        if removed:
+            IngredientAmount.objects.filter(
+                recipe=recipe, ingredient_id__in=removed).delete()
+        changed = []
+        for pk, row in current.items():
+            if pk in new and row.amount != new[pk]:
+                row.amount = new[pk]
+                changed.append(row)
+        IngredientAmount.objects.bulk_update(changed, ['amount'])
+        added = [
+            IngredientAmount(recipe=recipe, ingredient_id=pk, amount=amount)
+            for pk, amount in new.items() if pk not in current
+        ]
+        if added:
+            IngredientAmount.objects.bulk_create(added)
+            record_changes([recipe.pk])
+
     def create(self, validated_data):
         """Метод создания рецептов."""
         ingredients = validated_data.pop('ingredientamount_set')
         tags = validated_data.pop('tags')
-        recipe = Recipe.objects.create(**validated_data)
-        for tag in tags:
-            TagRecipe.objects.create(tag=tag, recipe=recipe)
-        recipe_ingredients = [
-            IngredientAmount(
-                ingredient=ingredient['id'],
-                recipe=recipe,
-                amount=ingredient['amount']
-            )
-            for ingredient in ingredients
-        ]
-        IngredientAmount.objects.bulk_create(recipe_ingredients)
+        with transaction.atomic():
+            recipe = Recipe.objects.create(**validated_data)
+            self.set_tags(recipe, tags)
+            self.set_ingredients(recipe, ingredients)
         return recipe
 
     def update(self, instance, validated_data):
         """Метод редактирования рецептов."""
-        ingredients = validated_data.pop('ingredientamount_set')
-        tags = validated_data.pop('tags')
-        instance.name = validated_data.get('name', instance.name)
-        instance.cooking_time = validated_data.get(
-            'cooking_time', instance.cooking_time)
-        instance.text = validated_data.get('text', instance.text)
-        instance.image = validated_data.get('image', instance.image)
-        TagRecipe.objects.filter(recipe=instance).delete()
-        IngredientAmount.objects.filter(recipe=instance).delete()
-        for tag in tags:
-            TagRecipe.objects.create(tag=tag, recipe=instance)
-        recipe_ingredients = [
-            IngredientAmount(
-                ingredient=ingredient['id'],
-                recipe=instance,
-                amount=ingredient['amount']
-            )
-            for ingredient in ingredients
-        ]
-        IngredientAmount.objects.bulk_create(recipe_ingredients)
-        instance.save()
+        ingredients = validated_data.pop('ingredientamount_set', None)
+        tags = validated_data.pop('tags', None)
+        with transaction.atomic():
+            for field, value in validated_data.items():
+                setattr(instance, field, value)
+            if tags is not None:
+                self.set_tags(instance, tags)
+            if ingredients is not None:
+                self.set_ingredients(instance, ingredients)
+            instance.save()
         return instance
 
 
-class RecipeReadSerializer(serializers.ModelSerializer):
+class RecipeListSerializer(serializers.ListSerializer):
+    """Список рецептов, собранный из кэша представлений."""
+
+    def to_representation(self, data):
+        if isinstance(data, models.Manager):
+            data = data.all()
+        return self.child.represent(list(data))
+
+
+class RecipeReadSerializer(RecipeFlagsMixin, ImageVariantsMixin,
+                           serializers.ModelSerializer):
+    """Сериализатор для чтения рецептов.
+
+    Поля описывают формат ответа, а само представление собирается
+    в represent_recipes напрямую из строк values(): не зависящая от
+    пользователя часть берётся из кэша, флаги текущего пользователя
+    добавляются при каждом ответе.
+    """
+
     author = MyUserSerializer(read_only=True)
     ingredients = IngredientAmountSerializer(
         source='ingredientamount_set',
         many=True
     )
     image = Base64ImageField()
+    image_variants = serializers.SerializerMethodField()
     tags = TagSerializer(many=True)
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'author', 'name', 'image', 'text', 'ingredients',
-                  'tags', 'cooking_time', 'is_favorited',
+        fields = ('id', 'author', 'name', 'image', 'image_variants', 'text',
+                  'ingredients', 'tags', 'cooking_time', 'is_favorited',
                   'is_in_shopping_cart')
+        list_serializer_class = RecipeListSerializer
 
-    def get_is_favorited(self, obj):
-        """Определение избранных рецептов."""
-        user = self.context['request'].user
-        return (not user.is_anonymous
-                and Favorite.objects.filter(user=user, recipe=obj).exists())
+    def to_representation(self, instance):
+        return self.represent([instance])[0]
 
-    def get_is_in_shopping_cart(self, obj):
-        """Определение рецептов для покупки."""
-        user = self.context['request'].user
-        return (not user.is_anonymous
-                and Cart.objects.filter(user=user, recipe=obj).exists())
+    def represent(self, recipes):
+        return represent_recipes(recipes, self.context['request'])
 
 
-class AddRecipeSerializer(serializers.ModelSerializer):
+class AddRecipeSerializer(ImageVariantsMixin, serializers.ModelSerializer):
     """Сериализатор рецептов для включения их в список избранного и покупок."""
 
     image = Base64ImageField(read_only=True)
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
         read_only_fields = ('id', 'name', 'cooking_time')
 
 
+class RecipeIdsSerializer(serializers.Serializer):
+    """Сериализатор списка id рецептов для пакетных операций."""
+
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.MAX_BULK_RECIPES
+    )
+
+    def validate_recipes(self, value):
+        """Все рецепты загружаются одним запросом."""
+        ids = list(dict.fromkeys(value))
+        recipes = Recipe.objects.in_bulk(ids)
+        missing = [pk for pk in ids if pk not in recipes]
+        if missing:
+            raise serializers.ValidationError(
+                f'Рецепты не найдены: {missing}')
+        return [recipes[pk] for pk in ids]
+
+
+class PantrySerializer(serializers.Serializer):
+    """Сериализатор списка id имеющихся у пользователя ингредиентов."""
+
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.PANTRY_MAX_INGREDIENTS
+    )
+
+
 class FollowListSerializer(UserSerializer):
     """Сериализатор списка подписчиков."""
 
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
@@ -228,28 +357,22 @@ class FollowListSerializer(UserSerializer):
     def get_is_subscribed(self, obj):
         """Метод определения подписки на пользователей."""
         if self.context:
-            username = self.context['request'].user
-            if not username.is_authenticated or obj.username == username:
+            user = self.context['request'].user
+            if not user.is_authenticated or obj == user:
                 return False
-            user = get_object_or_404(User, username=username)
-            author = get_object_or_404(User, username=obj.username)
-            return Follow.objects.filter(user=user, author=author).exists()
+            return get_relations(self.context['request']).is_subscribed(obj)
         return True
 
     def get_recipes(self, obj):
         """Получаем рецепты."""
+        if hasattr(obj, 'prefetched_recipes'):
+            return AddRecipeSerializer(obj.prefetched_recipes, many=True).data
         request = self.context.get('request')
         try:
             limit = request.GET.get('recipes_limit')
         except AttributeError:
             limit = False
-        author = get_object_or_404(User, username=obj.username)
-        recipes = Recipe.objects.filter(author=author)
-        if limit:
-            recipes = recipes.all()[:int(limit)]
+        recipes = obj.recipes.all()
+        if limit and limit.isdigit():
+            recipes = recipes[:int(limit)]
         return AddRecipeSerializer(recipes, many=True).data
-
-    def get_recipes_count(self, obj):
-        """Считаем рецепты."""
-        author = get_object_or_404(User, username=obj.username)
-        return Recipe.objects.filter(author=author).count()
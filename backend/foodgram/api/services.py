@@ -0,0 +1,72 @@
+from django.db import transaction
+from django.db.models import Sum
+
+from users.models import User
+
+from .counters import update_counter
+from .models import IngredientAmount
+
+
+def get_shopping_list(user):
+    """Суммарное количество ингредиентов из корзины одним запросом."""
+    return (
+        IngredientAmount.objects
+        .filter(recipe__cart__user=user)
+        .values('ingredient__name', 'ingredient__measurement_unit')
+        .annotate(total=Sum('amount'))
+        .order_by('ingredient__name', 'ingredient__measurement_unit')
+    )
+
+
+def iter_shopping_list(user):
+    """Построчный обход списка покупок без загрузки его в память."""
+    for row in get_shopping_list(user).iterator():
+        yield {
+            'name': row['ingredient__name'],
+            'measurement_unit': row['ingredient__measurement_unit'],
+            'amount': row['total'],
+        }
+
+
+def lock_lists(user):
+    """Блокировка строки пользователя до конца транзакции.
+
+    Добавления и удаления в избранном и корзине одного пользователя
+    выполняются по очереди, поэтому каждое видит результат предыдущего
+    и счётчики рецептов меняются ровно на число вставленных или
+    удалённых записей.
+    """
+    list(User.objects.select_for_update().filter(pk=user.pk)
+         .values_list('pk', flat=True))
+
+
+def add_recipes(model, user, recipes):
+    """Добавление рецептов в избранное или корзину одним запросом.
+
+    Счётчики увеличиваются только у рецептов, которых ещё не было
+    в списке.
+    """
+    with transaction.atomic():
+        lock_lists(user)
+        existing = set(
+            model.objects.filter(user=user, recipe__in=recipes)
+            .values_list('recipe_id', flat=True)
+        )
+        new = [recipe for recipe in recipes if recipe.pk not in existing]
+        model.objects.bulk_create(
+            [model(user=user, recipe=recipe) for recipe in new],
+            ignore_conflicts=True
+        )
+        update_counter(model, [recipe.pk for recipe in new], 1)
+
+
+def remove_recipes(model, user, recipes):
+    """Удаление рецептов из избранного или корзины.
+
+    Возвращает количество удалённых записей.
+    """
+    with transaction.atomic():
+        lock_lists(user)
+        deleted, _ = model.objects.filter(
+            user=user, recipe__in=recipes).delete()
+    return deleted
@@ -0,0 +1,140 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from users.models import Follow, User
+
+from .counters import instance_changed
+from .feed import fan_out, follow_changed
+
+from .fragments import invalidate_fragments
+from .images import schedule_variants
+from .models import (Cart, Favorite, Ingredient, IngredientAmount, Recipe,
+                     Tag, TagRecipe)
+from .pantry import record_changes
+from .tags import update_tags_masks
+from .versions import bump_version
+
+
+def bump_version_on_commit(name):
+    """Версия сдвигается после фиксации транзакции: иначе запрос,
+    пришедший до неё, закэширует старые данные под новой версией."""
+    transaction.on_commit(lambda: bump_version(name))
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredients_changed(sender, **kwargs):
+    """Сброс индекса автодополнения и кэша ответов с ингредиентами."""
+    bump_version_on_commit('ingredients')
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tags_changed(sender, **kwargs):
+    """Сброс закэшированных ответов с тегами."""
+    bump_version_on_commit('tags')
+
+
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def reference_data_changed(sender, **kwargs):
+    """Теги и ингредиенты входят в представления всех рецептов."""
+    bump_version_on_commit('recipes')
+
+
+def invalidate_fragments_on_commit(recipe_ids):
+    """Сброс представлений после фиксации транзакции: иначе запрос,
+    пришедший до неё, снова закэширует старое представление."""
+    recipe_ids = list(recipe_ids)
+    transaction.on_commit(lambda: invalidate_fragments(recipe_ids))
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    invalidate_fragments_on_commit([instance.pk])
+
+
+@receiver((post_save, post_delete), sender=IngredientAmount)
+@receiver((post_save, post_delete), sender=TagRecipe)
+def recipe_relation_changed(sender, instance, **kwargs):
+    invalidate_fragments_on_commit([instance.recipe_id])
+
+
+@receiver((post_save, post_delete), sender=TagRecipe)
+def recipe_tags_changed(sender, instance, **kwargs):
+    """Поддержка маски тегов при изменении тегов вне сериализатора."""
+    update_tags_masks([instance.recipe_id])
+
+
+@receiver((post_save, post_delete), sender=IngredientAmount)
+def recipe_ingredients_changed(sender, instance, **kwargs):
+    """Журнал изменений для индекса подбора рецептов по продуктам."""
+    record_changes([instance.recipe_id])
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, update_fields=None, **kwargs):
+    """Данные автора входят в представления его рецептов."""
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_fragments_on_commit(
+        instance.recipes.values_list('pk', flat=True))
+
+
+@receiver(pre_save, sender=Recipe)
+def recipe_image_replaced(sender, instance, **kwargs):
+    """Новая картинка требует новых уменьшенных копий."""
+    if instance.pk is None:
+        return
+    old_image = (
+        Recipe.objects.filter(pk=instance.pk)
+        .values_list('image', flat=True).first()
+    )
+    if old_image != instance.image.name:
+        instance.image_variants_ready = False
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_saved(sender, instance, **kwargs):
+    if instance.image and not instance.image_variants_ready:
+        schedule_variants(instance)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=Cart)
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Follow)
+def counted_created(sender, instance, created, raw=False, **kwargs):
+    """Увеличение счётчика владельца при создании записи."""
+    if created and not raw:
+        instance_changed(instance, 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=Cart)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Follow)
+def counted_deleted(sender, instance, **kwargs):
+    """Уменьшение счётчика владельца при удалении записи."""
+    instance_changed(instance, -1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_published(sender, instance, created, raw=False, **kwargs):
+    """Новый рецепт попадает в материализованные ленты подписчиков.
+
+    Запись делается после фиксации транзакции, когда дата публикации
+    рецепта уже окончательная.
+    """
+    if created and not raw:
+        transaction.on_commit(lambda: fan_out([instance]))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        follow_changed(instance, created=True)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    follow_changed(instance, created=False)
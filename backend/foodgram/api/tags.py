@@ -0,0 +1,55 @@
+from collections import defaultdict
+
+from django.db.models import Q
+
+from .models import Recipe, Tag, TagRecipe, get_tags_mask, tag_bit
+from .versions import get_version
+
+_slugs = None
+
+
+class TagSlugs(dict):
+    """Словарь slug → id тегов с версией, по которой он построен."""
+
+    def __init__(self, rows, version):
+        super().__init__(rows)
+        self.version = version
+
+
+def get_tag_ids():
+    """Словарь slug → id, перестраиваемый при смене версии тегов."""
+    global _slugs
+    version = get_version('tags')
+    if _slugs is None or _slugs.version != version:
+        _slugs = TagSlugs(Tag.objects.values_list('slug', 'id'), version)
+    return _slugs
+
+
+def tag_choices():
+    return [(slug, slug) for slug in get_tag_ids()]
+
+
+def filter_by_tags(queryset, slugs):
+    """Рецепты хотя бы с одним из тегов, без соединения таблиц.
+
+    Теги, для которых в маске нет бита, проверяются подзапросом.
+    """
+    tag_ids = get_tag_ids()
+    ids = [tag_ids[slug] for slug in slugs if slug in tag_ids]
+    condition = Q(tags_mask__anybits=get_tags_mask(ids))
+    without_bit = [pk for pk in ids if not tag_bit(pk)]
+    if without_bit:
+        condition |= Q(pk__in=TagRecipe.objects.filter(
+            tag_id__in=without_bit).values('recipe_id'))
+    return queryset.filter(condition)
+
+
+def update_tags_masks(recipe_ids):
+    """Пересчёт масок тегов у рецептов по таблице TagRecipe."""
+    tags = defaultdict(list)
+    for recipe_id, tag_id in TagRecipe.objects.filter(
+            recipe_id__in=recipe_ids).values_list('recipe_id', 'tag_id'):
+        tags[recipe_id].append(tag_id)
+    for recipe_id in recipe_ids:
+        Recipe.objects.filter(pk=recipe_id).update(
+            tags_mask=get_tags_mask(tags[recipe_id]))
@@ -0,0 +1,70 @@
+from hashlib import md5
+
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from users.models import User
+
+from ..models import Ingredient, IngredientAmount, Recipe, Tag, TagRecipe
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'foodgram-tests',
+    }
+}
+
+
+class FixturesMixin:
+    """Кэш в памяти, пустой перед каждым тестом, и фабрики объектов."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client = APIClient()
+
+    @staticmethod
+    def create_user(username, **kwargs):
+        return User.objects.create_user(
+            username=username, email=f'{username}@example.com',
+            password='password', first_name=username, last_name=username,
+            **kwargs)
+
+    @staticmethod
+    def create_recipe(author, name='Рецепт', tags=(), ingredients=(),
+                      **kwargs):
+        fields = {
+            'text': name,
+            'image': 'recipe/image/test.png',
+            'image_variants_ready': True,
+            'cooking_time': 10,
+            **kwargs,
+        }
+        recipe = Recipe.objects.create(author=author, name=name, **fields)
+        for tag in tags:
+            TagRecipe.objects.create(recipe=recipe, tag=tag)
+        for ingredient, amount in ingredients:
+            IngredientAmount.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=amount)
+        return recipe
+
+    @staticmethod
+    def create_tag(slug):
+        color = '#' + md5(slug.encode()).hexdigest()[:6].upper()
+        return Tag.objects.create(name=slug, color=color, slug=slug)
+
+    @staticmethod
+    def create_ingredient(name, measurement_unit='г'):
+        return Ingredient.objects.create(
+            name=name, measurement_unit=measurement_unit)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ApiTestCase(FixturesMixin, TestCase):
+    pass
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ApiTransactionTestCase(FixturesMixin, TransactionTestCase):
+    """Для проверок, зависящих от transaction.on_commit."""
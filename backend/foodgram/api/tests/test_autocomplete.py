@@ -0,0 +1,37 @@
+from django.test import SimpleTestCase, override_settings
+
+from ..autocomplete import IngredientIndex, search_ingredients
+from .base import ApiTransactionTestCase
+
+ROWS = [(1, 'Сахар'), (2, 'сахарная пудра'), (3, 'Ванильный сахар'),
+        (4, 'соль'), (5, 'Сахар тростниковый')]
+
+
+class IngredientIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.index = IngredientIndex(ROWS)
+
+    def test_prefix_matches_come_first(self):
+        self.assertEqual(self.index.search('сахар', 10), (1, 5, 2, 3))
+
+    def test_search_is_case_insensitive(self):
+        self.assertEqual(self.index.search('СОЛ', 10), (4,))
+
+    def test_limit(self):
+        self.assertEqual(self.index.search('сахар', 2), (1, 5))
+        self.assertEqual(self.index.search('пудра', 10), (2,))
+        self.assertEqual(self.index.search('мука', 10), ())
+
+
+class SearchIngredientsTests(ApiTransactionTestCase):
+
+    @override_settings(INGREDIENT_SEARCH_LIMIT=2)
+    def test_default_limit_and_rebuild_on_change(self):
+        self.create_ingredient('сахар')
+        self.create_ingredient('сахарная пудра')
+        self.create_ingredient('ванильный сахар')
+        self.assertEqual(len(search_ingredients(' сахар ')), 2)
+        self.assertEqual(search_ingredients('сол'), ())
+        salt = self.create_ingredient('соль')
+        self.assertEqual(search_ingredients('сол'), (salt.pk,))
@@ -0,0 +1,72 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from ..management.commands.benchmark import Command, compare, percentile
+from .base import ApiTestCase
+
+
+def report(**scenarios):
+    return {'scenarios': {
+        name: {'p50_ms': p95, 'p95_ms': p95, 'queries': queries}
+        for name, (p95, queries) in scenarios.items()
+    }}
+
+
+class BenchmarkHelpersTests(SimpleTestCase):
+
+    def test_percentile_nearest_rank(self):
+        values = [5, 1, 4, 2, 3]
+        self.assertEqual(percentile(values, 50), 3)
+        self.assertEqual(percentile(values, 95), 5)
+        self.assertEqual(percentile(values, 0), 1)
+        self.assertEqual(percentile([7], 95), 7)
+
+    def test_compare_reports_slowdowns_and_extra_queries(self):
+        baseline = report(list=(10, 4), detail=(5, 3), old=(1, 1))
+        current = report(list=(11.9, 4), detail=(6.5, 2), new=(100, 50))
+        self.assertEqual(compare(current, baseline, tolerance=0.2), [
+            {'scenario': 'detail', 'metric': 'p95_ms',
+             'baseline': 5, 'current': 6.5},
+        ])
+        current = report(list=(10, 5))
+        self.assertEqual(compare(current, baseline, tolerance=0.2), [
+            {'scenario': 'list', 'metric': 'queries',
+             'baseline': 4, 'current': 5},
+        ])
+
+    def finish(self, current, **options):
+        options = {'baseline': None, 'save_baseline': False,
+                   'tolerance': 0.2, 'fail_on_regression': False,
+                   'output': None, **options}
+        command = Command(stdout=StringIO())
+        command.finish(current, options)
+        return json.loads(command.stdout.getvalue())
+
+    def test_baseline_save_and_regression_failure(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'baseline.json')
+        self.finish(report(list=(10, 4)), baseline=path, save_baseline=True)
+        self.assertEqual(
+            self.finish(report(list=(10, 4)), baseline=path)['regressions'],
+            [])
+        with self.assertRaisesMessage(CommandError, 'Регрессий: 1.'):
+            self.finish(report(list=(20, 4)), baseline=path,
+                        fail_on_regression=True)
+
+
+class BenchmarkCommandTests(ApiTestCase):
+
+    def test_requires_seed_data(self):
+        with self.assertRaisesMessage(CommandError, 'seed_data'):
+            call_command('benchmark', stdout=StringIO())
+
+    def test_save_baseline_requires_path(self):
+        with self.assertRaisesMessage(CommandError, '--baseline'):
+            call_command('benchmark', save_baseline=True, stdout=StringIO())
@@ -0,0 +1,93 @@
+import threading
+
+from django.db import connection
+from django.test import skipUnlessDBFeature
+
+from users.models import Follow
+
+from ..counters import reconcile_counters
+from ..models import Cart, Favorite, Recipe
+from ..services import add_recipes, remove_recipes
+from .base import ApiTestCase, ApiTransactionTestCase
+
+
+class CounterTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.user = self.create_user('user')
+        self.recipes = [
+            self.create_recipe(self.author, f'Рецепт {number}')
+            for number in range(3)
+        ]
+
+    def counts(self, field):
+        return list(
+            Recipe.objects.order_by('pk').values_list(field, flat=True))
+
+    def test_repeated_adds_count_once(self):
+        add_recipes(Favorite, self.user, self.recipes[:2])
+        add_recipes(Favorite, self.user, self.recipes)
+        self.assertEqual(self.counts('favorites_count'), [1, 1, 1])
+        self.assertEqual(self.counts('carts_count'), [0, 0, 0])
+
+    def test_remove_counts_only_deleted_rows(self):
+        add_recipes(Cart, self.user, self.recipes[:1])
+        other = self.create_user('other')
+        add_recipes(Cart, other, self.recipes[:1])
+        self.assertEqual(remove_recipes(Cart, self.user, self.recipes), 1)
+        self.assertEqual(remove_recipes(Cart, self.user, self.recipes), 0)
+        self.assertEqual(self.counts('carts_count'), [1, 0, 0])
+
+    def test_api_endpoints_keep_counters(self):
+        self.client.force_authenticate(self.user)
+        url = f'/api/recipes/{self.recipes[0].pk}/favorite/'
+        self.client.post(url)
+        self.client.post(url)
+        self.assertEqual(self.counts('favorites_count'), [1, 0, 0])
+        self.client.delete(url)
+        self.assertEqual(self.counts('favorites_count'), [0, 0, 0])
+
+    def test_author_counters(self):
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 3)
+        Follow.objects.create(user=self.user, author=self.author)
+        self.recipes[0].delete()
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 2)
+        self.assertEqual(self.author.followers_count, 1)
+
+    def test_reconcile_fixes_drift(self):
+        add_recipes(Favorite, self.user, self.recipes[:1])
+        Recipe.objects.filter(pk=self.recipes[1].pk).update(
+            favorites_count=5)
+        fixed = reconcile_counters()
+        self.assertEqual(fixed['recipe.favorites_count'], 1)
+        self.assertEqual(self.counts('favorites_count'), [1, 0, 0])
+        self.assertEqual(reconcile_counters()['recipe.favorites_count'], 0)
+
+
+class ConcurrentCounterTests(ApiTransactionTestCase):
+
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_concurrent_adds_of_same_recipe_count_once(self):
+        author = self.create_user('author')
+        user = self.create_user('user')
+        recipe = self.create_recipe(author)
+        barrier = threading.Barrier(4)
+
+        def add():
+            try:
+                barrier.wait()
+                add_recipes(Favorite, user, [recipe])
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=add) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 1)
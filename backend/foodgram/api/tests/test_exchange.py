@@ -0,0 +1,98 @@
+import json
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from .. import exchange
+from ..exchange import export_recipes, import_recipes
+from ..models import Ingredient, Recipe
+from ..versions import get_version
+from .base import ApiTestCase, ApiTransactionTestCase
+
+
+def without_ids(lines):
+    records = [json.loads(line) for line in lines]
+    for record in records:
+        del record['id']
+    return records
+
+
+class RecipeExchangeMixin:
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        tags = [self.create_tag('breakfast'), self.create_tag('lunch')]
+        sugar = self.create_ingredient('сахар')
+        eggs = self.create_ingredient('яйца', 'шт')
+        for number in range(3):
+            self.create_recipe(
+                self.author, f'Рецепт {number}', tags=tags[number % 2:],
+                ingredients=[(eggs, number + 1), (sugar, 10)])
+
+
+class RecipeExchangeTests(RecipeExchangeMixin, ApiTestCase):
+
+    def test_export_import_round_trip(self):
+        exported = list(export_recipes(chunk_size=2))
+        self.assertEqual(len(exported), 3)
+        Recipe.objects.all().delete()
+        Ingredient.objects.filter(name='сахар').delete()
+        created, skipped = import_recipes(exported, chunk_size=2)
+        self.assertEqual((created, skipped), (3, 0))
+        self.assertEqual(without_ids(export_recipes()),
+                         without_ids(exported))
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 3)
+
+    def test_unknown_authors_are_skipped(self):
+        record = json.loads(next(export_recipes()))
+        record['author'] = {'username': 'ghost', 'email': 'g@example.com'}
+        lines = [json.dumps(record, ensure_ascii=False), '\n']
+        self.assertEqual(import_recipes(lines), (0, 1))
+
+    def test_export_endpoint_is_for_admins(self):
+        url = '/api/recipes/export/'
+        self.client.force_authenticate(self.author)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_authenticate(
+            self.create_user('admin', is_staff=True))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'],
+                         'application/x-ndjson; charset=utf-8')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)['name'] for line in lines],
+            ['Рецепт 0', 'Рецепт 1', 'Рецепт 2'])
+
+    def test_ingredients_missing_after_create_fail_clearly(self):
+        exported = list(export_recipes())
+        Ingredient.objects.filter(name='сахар').delete()
+        with mock.patch.object(exchange, 'find_ingredients',
+                               return_value={}):
+            with self.assertRaisesMessage(ValueError, 'сахар (г)'):
+                import_recipes(exported)
+            with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as file:
+                file.writelines(exported)
+                file.flush()
+                with self.assertRaisesMessage(CommandError, 'сахар (г)'):
+                    call_command('import_recipes', file.name,
+                                 stdout=StringIO())
+
+
+class RecipeImportVersionTests(RecipeExchangeMixin, ApiTransactionTestCase):
+
+    @mock.patch('api.signals.schedule_variants')
+    def test_new_ingredients_bump_version(self, schedule_variants):
+        exported = list(export_recipes())
+        Ingredient.objects.filter(name='сахар').delete()
+        version = get_version('ingredients')
+        import_recipes(exported[:1])
+        self.assertGreater(get_version('ingredients'), version)
+        version = get_version('ingredients')
+        import_recipes(exported[1:])
+        self.assertEqual(get_version('ingredients'), version)
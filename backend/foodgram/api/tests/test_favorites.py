@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Cart, Favorite, IngredientAmount, TagRecipe
+from .base import ApiTestCase
+
+
+class UniqueRelationsTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.user = self.create_user('user')
+        self.recipe = self.create_recipe(self.author)
+        self.client.force_authenticate(self.user)
+
+    def test_duplicates_are_rejected_by_database(self):
+        tag = self.create_tag('lunch')
+        ingredient = self.create_ingredient('сахар')
+        for model, fields in (
+                (Favorite, {'user': self.user}),
+                (Cart, {'user': self.user}),
+                (TagRecipe, {'tag': tag}),
+                (IngredientAmount, {'ingredient': ingredient,
+                                    'amount': 1})):
+            model.objects.create(recipe=self.recipe, **fields)
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                model.objects.create(recipe=self.recipe, **fields)
+
+    def test_repeated_add_is_idempotent(self):
+        for name, model in (('favorite', Favorite),
+                            ('shopping_cart', Cart)):
+            url = f'/api/recipes/{self.recipe.pk}/{name}/'
+            first = self.client.post(url)
+            second = self.client.post(url)
+            self.assertEqual((first.status_code, second.status_code),
+                             (201, 201))
+            self.assertEqual(second.json()['id'], self.recipe.pk)
+            self.assertEqual(model.objects.filter(user=self.user).count(), 1)
+
+    def test_remove_missing_returns_not_found(self):
+        url = f'/api/recipes/{self.recipe.pk}/favorite/'
+        self.client.post(url)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        self.assertEqual(
+            self.client.post('/api/recipes/0/favorite/').status_code, 404)
+
+
+class BatchEndpointsTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.user = self.create_user('user')
+        self.recipes = [self.create_recipe(self.author, f'Рецепт {number}')
+                        for number in range(3)]
+        self.ids = [recipe.pk for recipe in self.recipes]
+        self.client.force_authenticate(self.user)
+
+    def stored(self, model):
+        return set(model.objects.filter(user=self.user)
+                   .values_list('recipe_id', flat=True))
+
+    def test_batch_add_and_remove(self):
+        for name, model in (('favorite', Favorite),
+                            ('shopping_cart', Cart)):
+            url = f'/api/recipes/{name}/'
+            response = self.client.post(
+                url, {'recipes': self.ids + self.ids[:1]}, format='json')
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual([item['id'] for item in response.json()],
+                             self.ids)
+            self.assertEqual(self.stored(model), set(self.ids))
+            response = self.client.delete(
+                url, {'recipes': self.ids[:2]}, format='json')
+            self.assertEqual(response.status_code, 204)
+            self.assertEqual(self.stored(model), {self.ids[2]})
+
+    def test_batch_add_uses_fixed_number_of_queries(self):
+        url = '/api/recipes/favorite/'
+        counts = []
+        for ids in (self.ids[:1], self.ids):
+            with CaptureQueriesContext(connection) as context:
+                self.client.post(url, {'recipes': ids}, format='json')
+            counts.append(len(context.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_unknown_recipes_change_nothing(self):
+        response = self.client.post(
+            '/api/recipes/favorite/', {'recipes': [self.ids[0], 0, 999]},
+            format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.stored(Favorite), set())
+
+    def test_empty_and_oversized_lists(self):
+        for ids in ([], list(range(1, settings.MAX_BULK_RECIPES + 2))):
+            response = self.client.post(
+                '/api/recipes/favorite/', {'recipes': ids}, format='json')
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,87 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from users.models import Follow
+
+from ..feed import is_materialized, rebuild_feeds
+from ..models import FeedEntry, Recipe
+from .base import ApiTransactionTestCase
+
+FEED_URL = '/api/recipes/feed/'
+
+
+class FeedTests(ApiTransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('user')
+        self.first = self.create_user('first')
+        self.second = self.create_user('second')
+        stranger = self.create_user('stranger')
+        now = timezone.now()
+        recipes = []
+        for minutes, author in enumerate(
+                (self.first, self.second, stranger, self.first,
+                 self.second, self.first)):
+            recipe = self.create_recipe(author, f'Рецепт {minutes}')
+            Recipe.objects.filter(pk=recipe.pk).update(
+                pub_date=now - timedelta(minutes=10 - minutes))
+            recipes.append(recipe)
+        self.stranger_recipe = recipes.pop(2)
+        self.expected = [recipe.pk for recipe in reversed(recipes)]
+        Follow.objects.create(user=self.user, author=self.first)
+        Follow.objects.create(user=self.user, author=self.second)
+        self.client.force_authenticate(self.user)
+
+    def walk(self, limit=2):
+        pages = []
+        url, params = FEED_URL, {'limit': limit}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            pages.append([item['id'] for item in data['results']])
+            url, params = data['next'], None
+        return pages
+
+    def test_feed_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(FEED_URL).status_code, 401)
+
+    def test_feed_from_follows(self):
+        self.assertFalse(is_materialized(self.user))
+        pages = self.walk()
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), self.expected)
+
+    def test_materialized_feed_matches_query_feed(self):
+        expected = self.walk()
+        self.assertEqual(rebuild_feeds(threshold=2), 1)
+        self.assertTrue(is_materialized(self.user))
+        self.assertEqual(
+            FeedEntry.objects.filter(user=self.user).count(), 5)
+        self.assertEqual(self.walk(), expected)
+
+    def test_materialized_feed_follows_changes(self):
+        rebuild_feeds(threshold=2)
+        recipe = self.create_recipe(self.second, 'Новый')
+        self.assertEqual(sum(self.walk(), [])[0], recipe.pk)
+        Follow.objects.filter(user=self.user, author=self.first).delete()
+        Follow.objects.create(
+            user=self.user, author=self.stranger_recipe.author)
+        self.assertEqual(
+            set(sum(self.walk(), [])),
+            set(Recipe.objects.exclude(author=self.first)
+                .values_list('pk', flat=True)))
+
+    def test_rebuild_drops_feeds_below_threshold(self):
+        rebuild_feeds(threshold=2)
+        out = StringIO()
+        call_command('rebuild_feeds', threshold=3, stdout=out)
+        self.assertIn('Материализовано лент: 0.', out.getvalue())
+        self.assertFalse(is_materialized(self.user))
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(sum(self.walk(), []), self.expected)
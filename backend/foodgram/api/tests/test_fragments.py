@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from ..fragments import fragment_keys
+from ..models import IngredientAmount
+from .base import ApiTransactionTestCase
+
+
+class FragmentInvalidationTests(ApiTransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.tag = self.create_tag('breakfast')
+        self.ingredient = self.create_ingredient('сахар')
+        self.recipe = self.create_recipe(
+            self.author, 'Каша', tags=[self.tag],
+            ingredients=[(self.ingredient, 10)])
+
+    def get_recipe(self):
+        response = self.client.get(f'/api/recipes/{self.recipe.pk}/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def is_cached(self):
+        key, = fragment_keys([self.recipe.pk])
+        return cache.get(key) is not None
+
+    def test_fragment_is_cached(self):
+        self.get_recipe()
+        self.assertTrue(self.is_cached())
+
+    def test_recipe_change_invalidates_after_commit(self):
+        self.get_recipe()
+        with transaction.atomic():
+            self.recipe.name = 'Овсянка'
+            self.recipe.save()
+            self.assertTrue(self.is_cached())
+        self.assertFalse(self.is_cached())
+        self.assertEqual(self.get_recipe()['name'], 'Овсянка')
+
+    def test_rollback_keeps_fragment(self):
+        self.get_recipe()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.recipe.name = 'Овсянка'
+            self.recipe.save()
+            raise RuntimeError
+        self.assertTrue(self.is_cached())
+        self.assertEqual(self.get_recipe()['name'], 'Каша')
+
+    def test_ingredient_amount_change_invalidates(self):
+        self.get_recipe()
+        amount = IngredientAmount.objects.get(recipe=self.recipe)
+        amount.amount = 30
+        amount.save()
+        self.assertEqual(self.get_recipe()['ingredients'][0]['amount'], 30)
+
+    def test_author_change_invalidates(self):
+        self.get_recipe()
+        self.author.first_name = 'Иван'
+        self.author.save()
+        self.assertEqual(self.get_recipe()['author']['first_name'], 'Иван')
+
+    def test_reference_data_change_invalidates(self):
+        self.get_recipe()
+        self.tag.name = 'Завтрак'
+        self.tag.save()
+        self.assertEqual(self.get_recipe()['tags'][0]['name'], 'Завтрак')
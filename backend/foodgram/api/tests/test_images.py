@@ -0,0 +1,68 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from PIL import Image
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import override_settings
+
+from ..images import generate_variants_task, variant_name
+from ..models import Recipe
+from .base import ApiTestCase
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageVariantsTests(ApiTestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+
+    def create_recipe_with_image(self, name):
+        buffer = BytesIO()
+        Image.new('RGB', (64, 48), 'green').save(buffer, 'PNG')
+        image = default_storage.save(
+            f'recipe/image/{name}.png', ContentFile(buffer.getvalue()))
+        recipe = self.create_recipe(self.author, name, image=image)
+        Recipe.objects.filter(pk=recipe.pk).update(
+            image_variants_ready=False)
+        return recipe
+
+    def test_command_processes_every_recipe(self):
+        recipes = [self.create_recipe_with_image(f'r{i}') for i in range(3)]
+        out = StringIO()
+        call_command('generate_image_variants', '--all', stdout=out)
+        self.assertIn('Обработано рецептов: 3.', out.getvalue())
+        for recipe in recipes:
+            recipe.refresh_from_db()
+            self.assertTrue(recipe.image_variants_ready)
+            self.assertTrue(default_storage.exists(
+                variant_name(recipe.image.name, 'card', 'jpeg')))
+
+    def test_command_reports_broken_images_and_continues(self):
+        broken = self.create_recipe(self.author, 'broken',
+                                    image='recipe/image/missing.png')
+        Recipe.objects.filter(pk=broken.pk).update(
+            image_variants_ready=False)
+        recipe = self.create_recipe_with_image('ok')
+        out, err = StringIO(), StringIO()
+        call_command('generate_image_variants', stdout=out, stderr=err)
+        self.assertIn(f'Рецепт {broken.pk}', err.getvalue())
+        self.assertIn('С ошибками: 1.', out.getvalue())
+        recipe.refresh_from_db()
+        self.assertTrue(recipe.image_variants_ready)
+
+    def test_background_task_logs_errors(self):
+        with self.assertLogs('api.images', 'ERROR') as logs:
+            generate_variants_task(1, 'recipe/image/missing.png')
+        self.assertIn('recipe/image/missing.png', logs.output[0])
@@ -0,0 +1,51 @@
+import json
+
+from .base import ApiTestCase
+
+INGREDIENTS_URL = '/api/ingredients/'
+
+
+class IngredientListTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for name in ('сахар', 'соль', 'сметана', 'мука'):
+            self.create_ingredient(name)
+
+    def get(self, params=None, **headers):
+        response = self.client.get(INGREDIENTS_URL, params, **headers)
+        content = b''.join(response.streaming_content) if (
+            response.streaming) else response.content
+        return response, content
+
+    def test_list_is_streamed_and_then_served_from_cache(self):
+        first, content = self.get()
+        self.assertTrue(first.streaming)
+        with self.assertNumQueries(0):
+            second, cached = self.get()
+        self.assertFalse(second.streaming)
+        self.assertEqual(cached, content)
+        self.assertEqual(second['Content-Type'], first['Content-Type'])
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(len(json.loads(content)), 4)
+
+    def test_autocomplete_is_served_from_cache(self):
+        _, content = self.get({'name': 'С'})
+        with self.assertNumQueries(0):
+            _, cached = self.get({'name': 'С'})
+        self.assertEqual(cached, content)
+        self.assertEqual(
+            [item['name'] for item in json.loads(content)],
+            ['сахар', 'сметана', 'соль'])
+
+    def test_unfinished_stream_is_not_cached(self):
+        response = self.client.get(INGREDIENTS_URL)
+        next(iter(response.streaming_content))
+        response.close()
+        second, _ = self.get()
+        self.assertTrue(second.streaming)
+
+    def test_matching_etag_returns_not_modified(self):
+        first, _ = self.get()
+        second, _ = self.get(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
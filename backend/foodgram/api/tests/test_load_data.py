@@ -0,0 +1,91 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from ..management.commands.load_data import read_csv, read_json
+from ..models import Ingredient
+from .base import ApiTestCase
+
+ROWS = [
+    {'name': 'сахар', 'measurement_unit': 'г'},
+    {'name': 'соль', 'measurement_unit': 'г'},
+    {'name': 'сахар', 'measurement_unit': 'кг'},
+    {'name': ' сахар ', 'measurement_unit': 'г'},
+]
+
+
+class ReadJsonTests(SimpleTestCase):
+
+    def test_items_spanning_chunks(self):
+        file = io.StringIO(json.dumps(ROWS, ensure_ascii=False, indent=2))
+        self.assertEqual(list(read_json(file, chunk_size=7)), ROWS)
+
+    def test_invalid_input(self):
+        with self.assertRaises(CommandError):
+            list(read_json(io.StringIO('{"name": "сахар"}')))
+        with self.assertRaises(CommandError):
+            list(read_json(io.StringIO('[{"name": ')))
+
+
+class ReadCsvTests(SimpleTestCase):
+
+    def test_short_row_names_line(self):
+        file = io.StringIO('сахар,г\n\nсоль\n')
+        with self.assertRaisesMessage(CommandError, 'Строка 3'):
+            list(read_csv(file))
+
+
+class LoadDataTests(ApiTestCase):
+
+    def write(self, suffix, content):
+        with tempfile.NamedTemporaryFile(
+                'w', suffix=suffix, encoding='utf-8', delete=False) as file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def load(self, path, *args):
+        out = io.StringIO()
+        call_command('load_data', path, *args, stdout=out)
+        return out.getvalue()
+
+    def ingredients(self):
+        return sorted(Ingredient.objects.values_list(
+            'name', 'measurement_unit'))
+
+    def test_json_import_is_idempotent(self):
+        path = self.write('.json', json.dumps(ROWS, ensure_ascii=False))
+        self.assertIn('Добавлено: 3, уже в базе: 0.',
+                      self.load(path, '--batch-size', '2'))
+        self.assertIn('Добавлено: 0, уже в базе: 3.', self.load(path))
+        self.assertEqual(self.ingredients(), [
+            ('сахар', 'г'), ('сахар', 'кг'), ('соль', 'г')])
+
+    def test_csv_import_adds_only_missing(self):
+        self.create_ingredient('соль')
+        path = self.write('.csv', 'сахар,г\nсоль,г\n\n')
+        self.assertIn('Добавлено: 1, уже в базе: 1.', self.load(path))
+        self.assertEqual(self.ingredients(), [('сахар', 'г'), ('соль', 'г')])
+
+    def test_invalid_csv_loads_nothing(self):
+        path = self.write('.csv', 'сахар,г\nсоль\n')
+        with self.assertRaisesMessage(CommandError, 'Строка 2'):
+            self.load(path, '--batch-size', '1')
+        self.assertEqual(self.ingredients(), [])
+
+    def test_dry_run_writes_nothing(self):
+        path = self.write('.csv', 'сахар,г\n')
+        output = self.load(path, '--dry-run')
+        self.assertIn('+ сахар (г)', output)
+        self.assertEqual(self.ingredients(), [])
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(CommandError):
+            self.load(self.write('.txt', ''))
+        with self.assertRaises(CommandError):
+            self.load(self.write('.csv', ''), '--batch-size', '0')
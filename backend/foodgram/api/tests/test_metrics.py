@@ -0,0 +1,60 @@
+from django.test import override_settings
+
+from ..metrics import QueryBudgetExceeded, registry
+from .base import ApiTestCase
+
+
+class MetricsTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.recipe = self.create_recipe(
+            self.author, tags=[self.create_tag('lunch')])
+        self.create_ingredient('сахар')
+
+    def endpoint(self, name):
+        return registry.endpoints[name]
+
+    def test_serializer_time_is_recorded_separately(self):
+        metrics = self.endpoint('RecipeViewSet.list')
+        serialized, rendered = metrics.serialize.count, metrics.render_seconds
+        self.client.get('/api/recipes/')
+        self.assertEqual(metrics.serialize.count, serialized + 1)
+        self.assertGreater(metrics.serialize.sum, 0)
+        self.assertGreater(metrics.render_seconds, rendered)
+
+    def test_streamed_list_records_serializer_and_render_time(self):
+        metrics = self.endpoint('IngredientViewSet.list')
+        serialized, rendered = metrics.serialize.count, metrics.render_seconds
+        response = self.client.get('/api/ingredients/')
+        b''.join(response.streaming_content)
+        self.assertEqual(metrics.serialize.count, serialized + 1)
+        self.assertGreater(metrics.render_seconds, rendered)
+
+    def test_cached_response_skips_serializer(self):
+        metrics = self.endpoint('TagViewSet.list')
+        self.client.get('/api/tags/')
+        serialized = metrics.serialize.count
+        self.client.get('/api/tags/')
+        self.assertEqual(metrics.serialize.count, serialized)
+
+    def test_metrics_endpoint(self):
+        metrics = self.endpoint('RecipeViewSet.retrieve')
+        serialized = metrics.serialize.count
+        self.client.get(f'/api/recipes/{self.recipe.pk}/')
+        self.assertEqual(metrics.serialize.count, serialized + 1)
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 401)
+        self.client.force_authenticate(
+            self.create_user('admin', is_staff=True))
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'foodgram_serializer_duration_seconds_count'
+            '{endpoint="RecipeViewSet.retrieve"}',
+            response.content.decode())
+
+    @override_settings(QUERY_BUDGET=1)
+    def test_query_budget(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get('/api/recipes/')
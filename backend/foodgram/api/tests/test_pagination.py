@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from users.models import Follow
+
+from ..models import Recipe
+from .base import ApiTestCase
+
+RECIPES_URL = '/api/recipes/'
+
+
+class KeysetPaginationTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        recipes = [self.create_recipe(self.author, f'Рецепт {number}')
+                   for number in range(7)]
+        # Две пары рецептов с одинаковой датой: порядок решает id.
+        now = timezone.now()
+        dates = [now - timedelta(minutes=minutes)
+                 for minutes in (6, 5, 5, 3, 2, 2, 0)]
+        for recipe, date in zip(recipes, dates):
+            Recipe.objects.filter(pk=recipe.pk).update(pub_date=date)
+        self.expected = [recipe.pk for recipe in reversed(recipes)]
+
+    def walk(self, url, params=None, link='next'):
+        pages = []
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            pages.append([item['id'] for item in data['results']])
+            url, params = data[link], None
+        return pages, data
+
+    def test_forward_walk_visits_every_recipe_once(self):
+        pages, last = self.walk(RECIPES_URL, {'cursor': '', 'limit': 3})
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), self.expected)
+        self.assertNotIn('count', last)
+
+    def test_backward_walk_from_last_page(self):
+        pages, _ = self.walk(RECIPES_URL, {'cursor': '', 'limit': 3})
+        last_page_url = self.client.get(
+            RECIPES_URL, {'cursor': '', 'limit': 3}).json()['next']
+        last_page_url = self.client.get(last_page_url).json()['next']
+        back, first = self.walk(last_page_url, link='previous')
+        self.assertEqual(back, list(reversed(pages)))
+        self.assertIsNone(first['previous'])
+
+    def test_next_page_is_one_query_without_count(self):
+        first = self.client.get(RECIPES_URL, {'cursor': '', 'limit': 2})
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(first.json()['next'])
+        recipe_queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT "api_recipe"."id", '
+                                       '"api_recipe"."name", '
+                                       '"api_recipe"."text"')]
+        self.assertEqual(len(recipe_queries), 1)
+        self.assertNotIn('OFFSET', recipe_queries[0])
+        self.assertFalse(any('COUNT(' in query['sql']
+                             for query in context.captured_queries))
+
+    def test_invalid_cursor(self):
+        for cursor in ('abc', 'eyJ2IjpbMV19', 'eyJ2IjpbIngiLCAxXX0='):
+            response = self.client.get(RECIPES_URL, {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+    def test_page_numbers_still_work(self):
+        response = self.client.get(RECIPES_URL, {'page': 2, 'limit': 3})
+        data = response.json()
+        self.assertEqual(data['count'], 7)
+        self.assertEqual([item['id'] for item in data['results']],
+                         self.expected[3:6])
+
+    def test_subscriptions_cursor(self):
+        user = self.create_user('user')
+        authors = [self.create_user(f'author{number}') for number in range(5)]
+        for author in authors:
+            Follow.objects.create(user=user, author=author)
+        self.client.force_authenticate(user)
+        pages, _ = self.walk(
+            '/api/users/subscriptions/', {'cursor': '', 'limit': 2})
+        self.assertEqual(sum(pages, []), [author.pk for author in authors])
@@ -0,0 +1,134 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from .. import pantry
+from ..models import IngredientAmount
+from ..pantry import PantryIndex
+from .base import ApiTestCase, ApiTransactionTestCase
+
+PANTRY_URL = '/api/recipes/pantry/'
+
+
+class PantryIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.index = PantryIndex(
+            [(1, 10), (1, 11), (2, 10), (2, 11), (2, 12), (3, 12),
+             (4, 10), (4, 11)],
+            sequence=0
+        )
+
+    def test_match_orders_by_coverage_missing_and_newest(self):
+        self.assertEqual(self.index.match([10, 11], limit=10), [
+            (4, 1.0, 0), (1, 1.0, 0), (2, 2 / 3, 1)])
+
+    def test_match_respects_limit_and_duplicates(self):
+        self.assertEqual(self.index.match([12, 12], limit=1), [(3, 1.0, 0)])
+
+    def test_remove_and_add_keep_postings_sorted(self):
+        self.index.remove(1)
+        self.index.add(5, (12,))
+        self.index.add(0, (12,))
+        self.assertEqual(list(self.index.postings[10]), [2, 4])
+        self.assertEqual(list(self.index.postings[12]), [0, 2, 3, 5])
+        self.assertNotIn(1, self.index.recipes)
+
+
+class PantryMixin:
+
+    def setUp(self):
+        super().setUp()
+        pantry._index = None
+        self.addCleanup(setattr, pantry, '_index', None)
+        author = self.create_user('author')
+        self.flour = self.create_ingredient('мука')
+        self.egg = self.create_ingredient('яйцо', 'шт')
+        self.milk = self.create_ingredient('молоко', 'мл')
+        self.pancakes = self.create_recipe(
+            author, 'Блины',
+            ingredients=((self.flour, 200), (self.egg, 2), (self.milk, 500)))
+        self.omelette = self.create_recipe(
+            author, 'Омлет', ingredients=((self.egg, 3), (self.milk, 50)))
+
+    def match(self, *ingredients, **params):
+        response = self.client.get(PANTRY_URL, {
+            'ingredients': [ingredient.pk for ingredient in ingredients],
+            **params,
+        })
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+
+class PantryEndpointTests(PantryMixin, ApiTestCase):
+
+    def test_coverage_and_missing_count(self):
+        data = self.match(self.egg, self.milk)
+        self.assertEqual(
+            [(item['id'], item['coverage'], item['missing_count'])
+             for item in data],
+            [(self.omelette.pk, 1.0, 0), (self.pancakes.pk, 0.6667, 1)])
+        self.assertEqual(data[0]['name'], 'Омлет')
+
+    def test_paginated_with_limit(self):
+        data = self.match(self.egg, limit=1)
+        self.assertEqual(data['count'], 2)
+        self.assertEqual([item['id'] for item in data['results']],
+                         [self.omelette.pk])
+
+    def test_unknown_ingredient_is_rejected(self):
+        response = self.client.get(PANTRY_URL, {'ingredients': [0]})
+        self.assertEqual(response.status_code, 400)
+
+
+class PantryChangesTests(PantryMixin, ApiTransactionTestCase):
+
+    def test_index_catches_up_with_journal(self):
+        self.assertEqual(len(self.match(self.flour)), 1)
+        IngredientAmount.objects.create(
+            recipe=self.omelette, ingredient=self.flour, amount=10)
+        with mock.patch.object(pantry, 'build_index',
+                               wraps=pantry.build_index) as build_index:
+            data = self.match(self.flour)
+        build_index.assert_not_called()
+        self.assertEqual(
+            [(item['id'], item['missing_count']) for item in data],
+            [(self.omelette.pk, 2), (self.pancakes.pk, 2)])
+
+    def test_index_rebuilt_when_journal_is_lost(self):
+        self.match(self.flour)
+        IngredientAmount.objects.filter(ingredient=self.flour).delete()
+        pantry.cache.delete(
+            pantry.CHANGE_KEY.format(pantry.get_sequence()))
+        self.assertEqual(self.match(self.flour), [])
+
+    def test_taken_journal_entry_is_not_overwritten(self):
+        self.match(self.flour)
+        sequence = pantry.get_sequence()
+        taken = pantry.CHANGE_KEY.format(sequence + 1)
+        pantry.cache.set(taken, [self.pancakes.pk])
+        IngredientAmount.objects.create(
+            recipe=self.omelette, ingredient=self.flour, amount=10)
+        self.assertEqual(pantry.cache.get(taken), [self.pancakes.pk])
+        self.assertEqual(pantry.get_sequence(), sequence + 2)
+        self.assertEqual(
+            pantry.cache.get(pantry.CHANGE_KEY.format(sequence + 2)),
+            [self.omelette.pk])
+        self.assertEqual(len(self.match(self.flour)), 2)
+
+    def test_failed_record_invalidates_indexes(self):
+        self.match(self.flour)
+        with mock.patch.object(pantry.cache, 'add', return_value=False):
+            IngredientAmount.objects.create(
+                recipe=self.omelette, ingredient=self.flour, amount=10)
+        with mock.patch.object(pantry, 'build_index',
+                               wraps=pantry.build_index) as build_index:
+            self.assertEqual(len(self.match(self.flour)), 2)
+        build_index.assert_called_once()
+
+    def test_lost_sequence_invalidates_indexes(self):
+        self.match(self.flour)
+        pantry.cache.delete(pantry.SEQUENCE_KEY)
+        IngredientAmount.objects.create(
+            recipe=self.omelette, ingredient=self.flour, amount=10)
+        self.assertEqual(len(self.match(self.flour)), 2)
@@ -0,0 +1,78 @@
+from ..models import IngredientAmount, Recipe, TagRecipe
+from .base import ApiTransactionTestCase
+
+
+class RecipeUpdateTests(ApiTransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.tags = [self.create_tag(slug)
+                     for slug in ('breakfast', 'lunch', 'dinner')]
+        self.ingredients = [self.create_ingredient(name)
+                            for name in ('сахар', 'мука', 'соль')]
+        sugar, flour, _ = self.ingredients
+        self.recipe = self.create_recipe(
+            self.author, 'Блины', tags=self.tags[:2],
+            ingredients=[(sugar, 10), (flour, 200)])
+        self.url = f'/api/recipes/{self.recipe.pk}/'
+        self.client.force_authenticate(self.author)
+
+    def patch(self, **data):
+        return self.client.patch(self.url, data, format='json')
+
+    def amounts(self):
+        return dict(IngredientAmount.objects.filter(recipe=self.recipe)
+                    .values_list('ingredient_id', 'amount'))
+
+    def test_only_changed_rows_are_touched(self):
+        sugar, flour, salt = self.ingredients
+        kept = IngredientAmount.objects.get(
+            recipe=self.recipe, ingredient=flour).pk
+        kept_tag = TagRecipe.objects.get(
+            recipe=self.recipe, tag=self.tags[1]).pk
+        response = self.patch(
+            tags=[self.tags[1].pk, self.tags[2].pk],
+            ingredients=[{'id': flour.pk, 'amount': 250},
+                         {'id': salt.pk, 'amount': 1}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.amounts(), {flour.pk: 250, salt.pk: 1})
+        self.assertTrue(IngredientAmount.objects.filter(
+            pk=kept, amount=250).exists())
+        self.assertTrue(TagRecipe.objects.filter(pk=kept_tag).exists())
+        data = self.client.get(self.url).json()
+        self.assertEqual([tag['slug'] for tag in data['tags']],
+                         ['lunch', 'dinner'])
+        self.assertEqual(
+            {item['id']: item['amount'] for item in data['ingredients']},
+            {flour.pk: 250, salt.pk: 1})
+
+    def test_tags_mask_follows_tags(self):
+        self.patch(tags=[self.tags[2].pk])
+        response = self.client.get(
+            '/api/recipes/', {'tags': 'dinner', 'limit': 10})
+        self.assertEqual(
+            [item['id'] for item in response.json()['results']],
+            [self.recipe.pk])
+        response = self.client.get(
+            '/api/recipes/', {'tags': 'breakfast', 'limit': 10})
+        self.assertEqual(response.json()['results'], [])
+
+    def test_invalid_update_changes_nothing(self):
+        sugar, flour, _ = self.ingredients
+        before = self.amounts()
+        for ingredients in (
+                [{'id': sugar.pk, 'amount': 1}, {'id': sugar.pk, 'amount': 2}],
+                [{'id': 0, 'amount': 1}],
+                [{'id': flour.pk, 'amount': 0}],
+                []):
+            response = self.patch(name='Оладьи', ingredients=ingredients)
+            self.assertEqual(response.status_code, 400, ingredients)
+        response = self.patch(tags=[self.tags[0].pk, self.tags[0].pk])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.amounts(), before)
+        self.assertEqual(Recipe.objects.get(pk=self.recipe.pk).name, 'Блины')
+
+    def test_only_author_can_update(self):
+        self.client.force_authenticate(self.create_user('other'))
+        self.assertEqual(self.patch(name='Оладьи').status_code, 403)
@@ -0,0 +1,84 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from users.models import Follow
+
+from ..models import Cart, Favorite
+from ..services import add_recipes
+from .base import ApiTestCase
+
+RECIPES_URL = '/api/recipes/'
+
+
+class RecipeReadTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.user = self.create_user('user')
+        self.tags = [self.create_tag('breakfast'), self.create_tag('lunch')]
+        self.ingredients = [self.create_ingredient(name)
+                            for name in ('сахар', 'мука', 'соль')]
+
+    def add_recipes(self, count, author=None):
+        return [
+            self.create_recipe(
+                author or self.author, f'Рецепт {number}', tags=self.tags,
+                ingredients=[(ingredient, 10)
+                             for ingredient in self.ingredients])
+            for number in range(count)
+        ]
+
+    def count_queries(self, url, params=None):
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_list_queries_do_not_grow_with_page_size(self):
+        self.add_recipes(2)
+        small = self.count_queries(RECIPES_URL, {'limit': 2})
+        self.add_recipes(8, self.create_user('other'))
+        large = self.count_queries(RECIPES_URL, {'limit': 10})
+        self.assertEqual(small, large)
+
+    def test_flags_of_current_user(self):
+        favorite, in_cart, plain = self.add_recipes(3)
+        add_recipes(Favorite, self.user, [favorite])
+        add_recipes(Cart, self.user, [in_cart])
+        Follow.objects.create(user=self.user, author=self.author)
+        self.client.force_authenticate(self.user)
+        results = {
+            item['id']: item
+            for item in self.client.get(
+                RECIPES_URL, {'limit': 10}).json()['results']
+        }
+        flags = {
+            pk: (item['is_favorited'], item['is_in_shopping_cart'],
+                 item['author']['is_subscribed'])
+            for pk, item in results.items()
+        }
+        self.assertEqual(flags, {
+            favorite.pk: (True, False, True),
+            in_cart.pk: (False, True, True),
+            plain.pk: (False, False, True),
+        })
+
+    def test_anonymous_flags_are_false(self):
+        recipe, = self.add_recipes(1)
+        add_recipes(Favorite, self.user, [recipe])
+        item = self.client.get(f'{RECIPES_URL}{recipe.pk}/').json()
+        self.assertFalse(item['is_favorited'])
+        self.assertFalse(item['author']['is_subscribed'])
+
+    def test_detail_representation(self):
+        recipe, = self.add_recipes(1)
+        item = self.client.get(f'{RECIPES_URL}{recipe.pk}/').json()
+        self.assertEqual(
+            [tag['slug'] for tag in item['tags']], ['breakfast', 'lunch'])
+        self.assertEqual(
+            [(row['name'], row['amount']) for row in item['ingredients']],
+            [('сахар', 10), ('мука', 10), ('соль', 10)])
+        self.assertEqual(item['author']['username'], 'author')
+        self.assertTrue(item['image'].startswith('http://testserver/media/'))
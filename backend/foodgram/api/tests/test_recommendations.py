@@ -0,0 +1,84 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from ..models import Favorite, RecipeRecommendation
+from ..recommendations import build_recommendations, compute_neighbours
+from .base import ApiTestCase
+
+
+class RecommendationTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        author = self.create_user('author')
+        self.a, self.b, self.c, self.d, self.e = (
+            self.create_recipe(author, name) for name in 'ABCDE')
+        self.favorite('first', self.a, self.b)
+        self.favorite('second', self.a, self.b)
+        self.favorite('third', self.a, self.c)
+        self.favorite('fourth', self.d, self.e)
+        Favorite.objects.update(created=timezone.now() - timedelta(days=1))
+
+    def favorite(self, username, *recipes):
+        user = self.create_user(username)
+        for recipe in recipes:
+            Favorite.objects.create(user=user, recipe=recipe)
+        return user
+
+    def recommended(self, recipe):
+        response = self.client.get(
+            f'/api/recipes/{recipe.pk}/recommendations/')
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()]
+
+    def test_cosine_similarity(self):
+        neighbours = compute_neighbours()
+        self.assertEqual(
+            [(round(score, 4), other)
+             for score, other in neighbours[self.a.pk]],
+            [(0.8165, self.b.pk), (0.5774, self.c.pk)])
+        self.assertEqual(neighbours[self.d.pk], [(1.0, self.e.pk)])
+        self.assertEqual(compute_neighbours(top_k=1)[self.a.pk],
+                         neighbours[self.a.pk][:1])
+
+    def test_endpoint_orders_by_score(self):
+        self.assertEqual(self.recommended(self.a), [])
+        build_recommendations()
+        self.assertEqual(self.recommended(self.a), [self.b.pk, self.c.pk])
+        self.assertEqual(self.recommended(self.c), [self.a.pk])
+        response = self.client.get(
+            f'/api/recipes/{self.a.pk}/recommendations/')
+        self.assertEqual(set(response.json()[0]),
+                         {'id', 'name', 'image', 'image_variants',
+                          'cooking_time'})
+
+    def test_unknown_recipe_is_not_found(self):
+        response = self.client.get('/api/recipes/0/recommendations/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_incremental_build_touches_only_changed_recipes(self):
+        build_recommendations()
+        since = timezone.now()
+        self.favorite('fifth', self.b, self.c)
+        self.assertEqual(build_recommendations(since), 3)
+        self.assertEqual(self.recommended(self.b), [self.a.pk, self.c.pk])
+        self.assertEqual(self.recommended(self.d), [self.e.pk])
+        self.assertEqual(build_recommendations(timezone.now()), 0)
+
+    def test_full_build_drops_stale_recommendations(self):
+        build_recommendations()
+        Favorite.objects.filter(recipe=self.e).delete()
+        build_recommendations()
+        self.assertFalse(
+            RecipeRecommendation.objects.filter(recipe=self.d).exists())
+
+    def test_command_reports_recalculated_recipes(self):
+        out = StringIO()
+        call_command('build_recommendations', stdout=out)
+        self.assertIn('Пересчитано рецептов: 5.', out.getvalue())
+        out = StringIO()
+        call_command('build_recommendations', since_hours=1, stdout=out)
+        self.assertIn('Пересчитано рецептов: 0.', out.getvalue())
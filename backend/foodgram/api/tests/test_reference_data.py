@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import override_settings
+
+from ..versions import check_shared_cache, get_version
+from .base import ApiTestCase, ApiTransactionTestCase
+
+INGREDIENTS_URL = '/api/ingredients/'
+TAGS_URL = '/api/tags/'
+
+
+def body(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+class LoadDataInvalidationTests(ApiTestCase):
+
+    def load(self, rows):
+        with tempfile.NamedTemporaryFile(
+                'w', suffix='.csv', encoding='utf-8', delete=False) as file:
+            file.write(''.join(f'{name},{unit}\n' for name, unit in rows))
+        self.addCleanup(os.remove, file.name)
+        call_command('load_data', file.name, stdout=StringIO())
+
+    def test_load_data_invalidates_ingredient_responses(self):
+        self.load([('сахар', 'г')])
+        first = self.client.get(INGREDIENTS_URL)
+        body(first)
+        self.load([('соль', 'г')])
+        second = self.client.get(INGREDIENTS_URL)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(
+            [item['name'] for item in json.loads(body(second))],
+            ['сахар', 'соль'])
+        autocomplete = self.client.get(INGREDIENTS_URL, {'name': 'со'})
+        self.assertEqual(len(json.loads(body(autocomplete))), 1)
+
+    def test_load_data_without_changes_keeps_version(self):
+        self.load([('сахар', 'г')])
+        version = get_version('ingredients')
+        self.load([('сахар', 'г')])
+        self.assertEqual(get_version('ingredients'), version)
+
+
+class SignalInvalidationTests(ApiTransactionTestCase):
+
+    def test_version_changes_after_commit(self):
+        version = get_version('ingredients')
+        with transaction.atomic():
+            self.create_ingredient('мука')
+            self.assertEqual(get_version('ingredients'), version)
+        self.assertNotEqual(get_version('ingredients'), version)
+
+    def test_rolled_back_change_keeps_version(self):
+        version = get_version('tags')
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.create_tag('breakfast')
+            raise RuntimeError
+        self.assertEqual(get_version('tags'), version)
+
+    def test_tag_change_invalidates_tag_responses(self):
+        tag = self.create_tag('breakfast')
+        self.client.get(TAGS_URL)
+        tag.name = 'Завтрак'
+        tag.save()
+        response = self.client.get(TAGS_URL)
+        self.assertEqual(json.loads(response.content)[0]['name'], 'Завтрак')
+
+
+class SharedCacheCheckTests(ApiTestCase):
+
+    def test_locmem_cache_is_reported(self):
+        errors = check_shared_cache(None)
+        self.assertEqual([error.id for error in errors], ['api.W001'])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tempfile.gettempdir(),
+    }})
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,52 @@
+from rest_framework.test import APIRequestFactory
+
+from users.models import Follow
+
+from ..models import Cart, Favorite
+from ..relations import get_relations
+from ..services import add_recipes
+from .base import ApiTestCase
+
+
+class RelationsTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.user = self.create_user('user')
+        self.recipes = [self.create_recipe(self.author, f'Рецепт {number}')
+                        for number in range(3)]
+        add_recipes(Favorite, self.user, self.recipes[:2])
+        add_recipes(Cart, self.user, self.recipes[2:])
+        Follow.objects.create(user=self.user, author=self.author)
+        self.request = APIRequestFactory().get('/')
+        self.request.user = self.user
+
+    def test_each_relation_is_loaded_once_per_request(self):
+        relations = get_relations(self.request)
+        with self.assertNumQueries(3):
+            for recipe in self.recipes:
+                relations.is_favorited(recipe)
+                relations.is_in_shopping_cart(recipe)
+                relations.is_subscribed(recipe.author)
+        self.assertIs(get_relations(self.request), relations)
+        self.assertEqual(relations.favorites,
+                         {recipe.pk for recipe in self.recipes[:2]})
+        self.assertEqual(relations.cart, {self.recipes[2].pk})
+        self.assertEqual(relations.following, {self.author.pk})
+
+    def test_other_user_gets_own_relations(self):
+        relations = get_relations(self.request)
+        self.request.user = self.author
+        other = get_relations(self.request)
+        self.assertIsNot(other, relations)
+        self.assertEqual(other.favorites, frozenset())
+
+    def test_list_loads_relations_once(self):
+        self.client.force_authenticate(self.user)
+        url = '/api/recipes/'
+        with self.assertNumQueries(8):
+            response = self.client.get(url, {'limit': 3})
+        self.assertEqual(
+            [item['is_favorited'] for item in response.json()['results']],
+            [False, True, True])
@@ -0,0 +1,113 @@
+import datetime
+import json
+from decimal import Decimal
+
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import gettext_lazy
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from users.models import Follow
+
+from ..models import Cart, Favorite, Recipe
+from ..renderers import FastJSONRenderer
+from ..representations import represent_recipes
+from ..serializers import RecipeReadSerializer
+from .base import ApiTestCase
+
+
+class RepresentationTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('user')
+        author = self.create_user('author')
+        tags = [self.create_tag(slug) for slug in ('breakfast', 'lunch')]
+        ingredients = [
+            self.create_ingredient('соль'),
+            self.create_ingredient('мука'),
+            self.create_ingredient('яйцо', 'шт'),
+        ]
+        self.recipes = [
+            self.create_recipe(
+                author, f'Рецепт {number}', tags=tags[number % 2:],
+                ingredients=[(ingredient, number + 1)
+                             for ingredient in ingredients[number:]],
+                image_variants_ready=bool(number % 2))
+            for number in range(3)
+        ]
+        Follow.objects.create(user=self.user, author=author)
+        Favorite.objects.create(user=self.user, recipe=self.recipes[0])
+        Cart.objects.create(user=self.user, recipe=self.recipes[1])
+
+    def get_request(self):
+        request = APIRequestFactory().get('/api/recipes/')
+        force_authenticate(request, self.user)
+        return APIView().initialize_request(request)
+
+    def serialize(self, recipe, request):
+        serializer = RecipeReadSerializer(context={'request': request})
+        return json.loads(json.dumps(
+            serializers.ModelSerializer.to_representation(serializer, recipe)
+        ))
+
+    def test_matches_model_serializer(self):
+        request = self.get_request()
+        recipes = list(Recipe.objects.order_by('id'))
+        expected = [self.serialize(recipe, request) for recipe in recipes]
+        self.assertEqual(represent_recipes(recipes, request), expected)
+        self.assertEqual(
+            [(item['is_favorited'], item['is_in_shopping_cart'])
+             for item in expected],
+            [(True, False), (False, True), (False, False)])
+        self.assertTrue(expected[0]['author']['is_subscribed'])
+
+    def test_fragments_are_reused_across_users(self):
+        recipes = list(Recipe.objects.order_by('id'))
+        represent_recipes(recipes, self.get_request())
+        self.user = self.create_user('other')
+        request = self.get_request()
+        with CaptureQueriesContext(connection) as context:
+            data = represent_recipes(recipes, request)
+        tables = ('"api_recipe"', '"api_tagrecipe"', '"api_ingredientamount"')
+        self.assertFalse([
+            query['sql'] for query in context.captured_queries
+            if any(table in query['sql'] for table in tables)
+        ])
+        self.assertFalse(any(item['is_favorited'] for item in data))
+        self.assertFalse(data[0]['author']['is_subscribed'])
+
+
+class FastJSONRendererTests(SimpleTestCase):
+
+    def assertSameBytes(self, data, **context):
+        self.assertEqual(
+            FastJSONRenderer().render(data, renderer_context=context),
+            JSONRenderer().render(data, renderer_context=context))
+
+    def test_byte_identical_output(self):
+        self.assertSameBytes({
+            'text': 'Щи и каша «с маслом» </script>',
+            'float': 1.5,
+            'int': -7,
+            'nested': [None, True, {'a': []}],
+            'date': datetime.date(2024, 1, 2),
+            'datetime': datetime.datetime(2024, 1, 2, 3, 4, 5, 678000,
+                                          tzinfo=datetime.timezone.utc),
+            'time': datetime.time(12, 30),
+            'decimal': Decimal('1.50'),
+            'lazy': gettext_lazy('Рецепт'),
+            1: 'числовой ключ',
+        })
+
+    def test_fallbacks_match_json_renderer(self):
+        self.assertSameBytes({'big': 2 ** 70})
+        for renderer in (FastJSONRenderer(), JSONRenderer()):
+            with self.assertRaises(UnicodeEncodeError):
+                renderer.render({'surrogate': '\ud800'})
+        self.assertSameBytes({'a': [1, 2]}, indent=2)
+        self.assertSameBytes(None)
@@ -0,0 +1,77 @@
+from unittest import skipUnless
+
+from django.db import connection
+
+from ..models import Recipe
+from ..search import SQLITE_TRIGGERS, fts_query, restore_search_triggers
+from .base import ApiTestCase
+
+RECIPES_URL = '/api/recipes/'
+
+
+class SearchTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        author = self.create_user('author')
+        self.soup = self.create_recipe(
+            author, 'Грибной суп', text='Суп из белых грибов.')
+        self.pie = self.create_recipe(
+            author, 'Пирог', text='Начинка из грибов и лука.')
+        self.salad = self.create_recipe(
+            author, 'Салат', text='Огурцы, помидоры, зелень.')
+
+    def search(self, text):
+        response = self.client.get(
+            RECIPES_URL, {'search': text, 'limit': 10})
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()['results']]
+
+    def test_name_match_ranks_first(self):
+        self.assertEqual(self.search('гриб'), [self.soup.pk, self.pie.pk])
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.search('грибов лука'), [self.pie.pk])
+        self.assertEqual(self.search('огурцы грибов'), [])
+
+    def test_special_characters_are_not_syntax(self):
+        self.assertEqual(self.search('"салат" OR *'), [])
+        self.assertEqual(self.search('  '), [
+            self.salad.pk, self.pie.pk, self.soup.pk])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.salad.name = 'Грибной салат'
+        self.salad.save()
+        self.assertIn(self.salad.pk, self.search('грибной'))
+        Recipe.objects.filter(pk=self.soup.pk).update(text='Бульон.')
+        self.assertEqual(self.search('белых'), [])
+        self.pie.delete()
+        self.assertEqual(self.search('лука'), [])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Триггеры FTS5 только в SQLite.')
+class SQLiteTriggersTests(ApiTestCase):
+
+    def triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                "AND name LIKE 'api_recipe_search%'")
+            return {name for name, in cursor.fetchall()}
+
+    def test_fts_query_quotes_words_as_prefixes(self):
+        self.assertEqual(fts_query('суп "из"  грибов'),
+                         '"суп"* """из"""* "грибов"*')
+
+    def test_missing_triggers_are_restored_and_index_rebuilt(self):
+        self.assertEqual(self.triggers(), set(SQLITE_TRIGGERS))
+        with connection.cursor() as cursor:
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER {name}')
+        recipe = self.create_recipe(self.create_user('author'), 'Борщ')
+        self.assertEqual(self.triggers(), set())
+        restore_search_triggers()
+        self.assertEqual(self.triggers(), set(SQLITE_TRIGGERS))
+        response = self.client.get(RECIPES_URL, {'search': 'борщ'})
+        self.assertEqual([item['id'] for item in response.json()],
+                         [recipe.pk])
@@ -0,0 +1,56 @@
+import json
+
+from ..models import Cart
+from ..services import add_recipes
+from .base import ApiTestCase
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+class ShoppingListTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('user')
+        sugar = self.create_ingredient('сахар')
+        flour = self.create_ingredient('мука')
+        eggs = self.create_ingredient('яйца', 'шт')
+        recipes = [
+            self.create_recipe(self.user, 'Блины',
+                               ingredients=[(flour, 200), (sugar, 20)]),
+            self.create_recipe(self.user, 'Омлет', ingredients=[(eggs, 3)]),
+            self.create_recipe(self.user, 'Торт',
+                               ingredients=[(flour, 300), (eggs, 4)]),
+        ]
+        add_recipes(Cart, self.user, recipes)
+        self.client.force_authenticate(self.user)
+
+    def download(self, file_format):
+        response = self.client.get(URL, {'format': file_format})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_amounts_are_summed_per_ingredient(self):
+        self.assertEqual(json.loads(self.download('json')), [
+            {'name': 'мука', 'measurement_unit': 'г', 'amount': 500},
+            {'name': 'сахар', 'measurement_unit': 'г', 'amount': 20},
+            {'name': 'яйца', 'measurement_unit': 'шт', 'amount': 7},
+        ])
+
+    def test_text_and_csv_formats(self):
+        self.assertEqual(
+            self.download('txt'),
+            'Список покупок:\n\nмука (г) = 500\nсахар (г) = 20'
+            '\nяйца (шт) = 7')
+        self.assertEqual(
+            self.download('csv').splitlines(),
+            ['name,measurement_unit,amount', 'мука,г,500', 'сахар,г,20',
+             'яйца,шт,7'])
+
+    def test_list_is_built_with_one_query(self):
+        with self.assertNumQueries(1):
+            self.download('json')
+
+    def test_anonymous_user_is_rejected(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(URL).status_code, 401)
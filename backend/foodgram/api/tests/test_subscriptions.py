@@ -0,0 +1,56 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from users.models import Follow
+
+from .base import ApiTestCase
+
+URL = '/api/users/subscriptions/'
+
+
+class SubscriptionsTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('user')
+        self.client.force_authenticate(self.user)
+
+    def follow_authors(self, count, recipes=3, start=0):
+        authors = []
+        for number in range(start, start + count):
+            author = self.create_user(f'author{number}')
+            for recipe in range(recipes):
+                self.create_recipe(author, f'Рецепт {number}.{recipe}')
+            Follow.objects.create(user=self.user, author=author)
+            authors.append(author)
+        return authors
+
+    def count_queries(self, params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(URL, params)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_queries_do_not_grow_with_authors(self):
+        self.follow_authors(2)
+        small = self.count_queries({'limit': 10})
+        self.follow_authors(6, start=2)
+        self.assertEqual(self.count_queries({'limit': 10}), small)
+
+    def test_recipes_limit_and_count(self):
+        author, = self.follow_authors(1, recipes=4)
+        response = self.client.get(URL, {'limit': 10, 'recipes_limit': 2})
+        item, = response.json()['results']
+        self.assertEqual(item['id'], author.pk)
+        self.assertTrue(item['is_subscribed'])
+        self.assertEqual(item['recipes_count'], 4)
+        self.assertEqual(
+            [recipe['name'] for recipe in item['recipes']],
+            ['Рецепт 0.3', 'Рецепт 0.2'])
+
+    def test_only_own_subscriptions(self):
+        self.follow_authors(2)
+        other = self.create_user('other')
+        self.client.force_authenticate(other)
+        self.assertEqual(
+            self.client.get(URL, {'limit': 10}).json()['results'], [])
@@ -0,0 +1,54 @@
+from ..models import TAG_MASK_BITS, Recipe, Tag, TagRecipe, get_tags_mask
+from .base import ApiTestCase
+
+RECIPES_URL = '/api/recipes/'
+
+
+class TagFilterTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        author = self.create_user('author')
+        self.breakfast = self.create_tag('breakfast')
+        self.lunch = self.create_tag('lunch')
+        self.late = Tag.objects.create(
+            id=TAG_MASK_BITS + 5, name='late', color='#000001', slug='late')
+        self.recipes = {
+            'breakfast': self.create_recipe(
+                author, 'Каша', tags=[self.breakfast]),
+            'lunch': self.create_recipe(author, 'Суп', tags=[self.lunch]),
+            'both': self.create_recipe(
+                author, 'Омлет', tags=[self.breakfast, self.lunch]),
+            'late': self.create_recipe(author, 'Чай', tags=[self.late]),
+            'none': self.create_recipe(author, 'Хлеб'),
+        }
+
+    def filtered(self, *slugs):
+        response = self.client.get(
+            RECIPES_URL, {'tags': list(slugs), 'limit': 10})
+        self.assertEqual(response.status_code, 200)
+        ids = {item['id'] for item in response.json()['results']}
+        return {name for name, recipe in self.recipes.items()
+                if recipe.pk in ids}
+
+    def test_any_of_the_tags(self):
+        self.assertEqual(self.filtered('breakfast'), {'breakfast', 'both'})
+        self.assertEqual(self.filtered('breakfast', 'lunch'),
+                         {'breakfast', 'lunch', 'both'})
+
+    def test_tag_without_bit_is_filtered_by_subquery(self):
+        self.assertEqual(self.filtered('late'), {'late'})
+        self.assertEqual(self.filtered('late', 'lunch'),
+                         {'late', 'lunch', 'both'})
+
+    def test_mask_follows_tag_rows(self):
+        recipe = self.recipes['none']
+        TagRecipe.objects.create(recipe=recipe, tag=self.lunch)
+        self.assertEqual(Recipe.objects.get(pk=recipe.pk).tags_mask,
+                         get_tags_mask([self.lunch.pk]))
+        TagRecipe.objects.filter(recipe=recipe).delete()
+        self.assertEqual(Recipe.objects.get(pk=recipe.pk).tags_mask, 0)
+
+    def test_unknown_tag_is_rejected(self):
+        response = self.client.get(RECIPES_URL, {'tags': 'unknown'})
+        self.assertEqual(response.status_code, 400)
@@ -1,9 +1,9 @@
 from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
-from users.views import APIFollow, FollowViewSet
+from users.views import APIFollow, FollowViewSet, UserViewSet
 
-from .views import IngredientViewSet, RecipeViewSet, TagViewSet
+from .views import IngredientViewSet, MetricsView, RecipeViewSet, TagViewSet
 
 app_name = 'api'
 
@@ -16,10 +16,11 @@ router.register(
     FollowViewSet,
     basename='subscriptions'
 )
+router.register('users', UserViewSet, basename='user')
 
 urlpatterns = [
+    path('metrics/', MetricsView.as_view()),
     path('users/<int:pk>/subscribe/', APIFollow.as_view()),
     path('', include(router.urls)),
-    path('', include('djoser.urls')),
     re_path('auth/', include('djoser.urls.authtoken')),
 ]
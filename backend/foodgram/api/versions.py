@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core import checks
+
+VERSION_KEY = 'version:{}'
+
+
+def get_version(name):
+    """Текущая версия набора данных.
+
+    Хранится в кэше default, поэтому общая для всех процессов, только
+    если общий сам кэш (см. check_shared_cache).
+    """
+    key = VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    """Сдвиг версии после изменения данных."""
+    key = VERSION_KEY.format(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = int(time.time() * 1000)
+        cache.set(key, version, timeout=None)
+        return version
+
+
+@checks.register()
+def check_shared_cache(app_configs, **kwargs):
+    """LocMemCache у каждого процесса свой: версии, изменённые
+    management-командами, до воркеров gunicorn не доходят."""
+    backend = settings.CACHES['default']['BACKEND']
+    if backend.endswith('.LocMemCache'):
+        return [checks.Warning(
+            'Кэш default хранится в памяти процесса.',
+            hint=('Версии данных и инвалидация кэша не передаются между '
+                  'процессами; укажите общий CACHE_BACKEND.'),
+            id='api.W001',
+        )]
+    return []
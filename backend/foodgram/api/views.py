@@ -1,22 +1,37 @@
-from django.http import HttpResponse
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters import rest_framework
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from api.serializers import AddRecipeSerializer
-from users.models import User
 
+from .exchange import export_recipes
+from .feed import (ENTRY_ORDERING, RECIPE_ORDERING, get_feed_entries,
+                   get_feed_recipes, is_materialized)
 from .filters import IngredientFilter, RecipeFilter
-from .models import Cart, Favorite, Ingredient, IngredientAmount, Recipe, Tag
-from .pagination import CustomPagination
+from .models import Cart, Favorite, Ingredient, Recipe, Tag
+from .metrics import registry
+from .mixins import (CachedReadMixin, SerializationMetricsMixin,
+                     StreamingListMixin)
+from .pagination import CustomPagination, KeysetPagination
 from .permissions import OwnerOrReadOnly
-from .serializers import (IngredientSerializer, RecipeCreateSerializer,
+from .renderers import (NDJSONRenderer, PrometheusRenderer,
+                        ShoppingListCSVRenderer, ShoppingListJSONRenderer,
+                        ShoppingListTextRenderer)
+from .pantry import match_pantry
+from .serializers import (IngredientSerializer, PantrySerializer,
+                          RecipeCreateSerializer, RecipeIdsSerializer,
                           RecipeReadSerializer, TagSerializer)
+from .services import add_recipes, iter_shopping_list, remove_recipes
 
 
-class TagViewSet(mixins.ListModelMixin,
+class TagViewSet(CachedReadMixin,
+                 SerializationMetricsMixin,
+                 mixins.ListModelMixin,
                  mixins.RetrieveModelMixin,
                  viewsets.GenericViewSet):
     """Вьюсет для работы с тегами."""
@@ -24,9 +39,12 @@ class TagViewSet(mixins.ListModelMixin,
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (OwnerOrReadOnly,)
+    cache_version_name = 'tags'
 
 
-class IngredientViewSet(mixins.ListModelMixin,
+class IngredientViewSet(CachedReadMixin,
+                        StreamingListMixin,
+                        mixins.ListModelMixin,
                         mixins.RetrieveModelMixin,
                         viewsets.GenericViewSet):
     """Вьюсет для работы с ингредиентами."""
@@ -36,9 +54,10 @@ class IngredientViewSet(mixins.ListModelMixin,
     filter_backends = (rest_framework.DjangoFilterBackend,)
     filterset_class = IngredientFilter
     permission_classes = (OwnerOrReadOnly,)
+    cache_version_name = 'ingredients'
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(SerializationMetricsMixin, viewsets.ModelViewSet):
     """Вьюсет для работы с рецептами."""
 
     queryset = Recipe.objects.all()
@@ -57,6 +76,31 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    def relation_create_delete(self, model, request, pk):
+        """Идемпотентное добавление рецепта в список или удаление из него."""
+        recipe = get_object_or_404(Recipe, pk=pk)
+        if request.method == 'POST':
+            add_recipes(model, request.user, [recipe])
+            recipe_serializer = AddRecipeSerializer(recipe)
+            return Response(recipe_serializer.data,
+                            status=status.HTTP_201_CREATED)
+        if not remove_recipes(model, request.user, [recipe]):
+            raise Http404
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def relation_bulk(self, model, request):
+        """Пакетное добавление или удаление рецептов по списку id."""
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipes = serializer.validated_data['recipes']
+        if request.method == 'POST':
+            add_recipes(model, request.user, recipes)
+            recipe_serializer = AddRecipeSerializer(recipes, many=True)
+            return Response(recipe_serializer.data,
+                            status=status.HTTP_201_CREATED)
+        remove_recipes(model, request.user, recipes)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     @action(
         methods=['post', 'delete'],
         detail=False,
@@ -64,16 +108,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
     def favorite_create_delete(self, request, pk=None):
         """Метод добавления и удаления из избранного."""
-        user = get_object_or_404(User, username=request.user)
-        recipe = get_object_or_404(Recipe, pk=pk)
-        if str(request.method) == 'POST':
-            Favorite.objects.get_or_create(user=user, recipe=recipe)
-            recipe_serializer = AddRecipeSerializer(recipe)
-            return Response(recipe_serializer.data,
-                            status=status.HTTP_201_CREATED)
-        instance = get_object_or_404(Favorite, user=user, recipe=recipe)
-        instance.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        return self.relation_create_delete(Favorite, request, pk)
 
     @action(
         methods=['post', 'delete'],
@@ -82,43 +117,135 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
     def cart_create_delete(self, request, pk=None):
         """Метод добавления и удаления из списка покупок."""
-        user = get_object_or_404(User, username=request.user)
+        return self.relation_create_delete(Cart, request, pk)
+
+    @action(methods=['post', 'delete'], detail=False, url_path='favorite')
+    def favorite_bulk(self, request):
+        """Пакетное добавление и удаление рецептов из избранного."""
+        return self.relation_bulk(Favorite, request)
+
+    @action(
+        methods=['post', 'delete'],
+        detail=False,
+        url_path='shopping_cart'
+    )
+    def cart_bulk(self, request):
+        """Пакетное добавление и удаление рецептов из списка покупок."""
+        return self.relation_bulk(Cart, request)
+
+    @action(
+        methods=['get'],
+        detail=False,
+        url_path=r'(?P<pk>\d+)/recommendations'
+    )
+    def recommendations(self, request, pk=None):
+        """Рецепты, которые добавляют в избранное вместе с этим."""
         recipe = get_object_or_404(Recipe, pk=pk)
-        if str(request.method) == 'POST':
-            Cart.objects.get_or_create(user=user, recipe=recipe)
-            recipe_serializer = AddRecipeSerializer(recipe)
-            return Response(recipe_serializer.data,
-                            status=status.HTTP_201_CREATED)
-        instance = get_object_or_404(Cart, user=user, recipe=recipe)
-        instance.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        recipes = Recipe.objects.filter(
+            recommended_for__recipe=recipe
+        ).order_by('-recommended_for__score', 'recommended_for__id')
+        serializer = AddRecipeSerializer(
+            recipes, many=True, context=self.get_serializer_context())
+        return Response(self.serialize(serializer))
 
     @action(
         methods=['get'],
         detail=False,
-        url_path='download_shopping_cart'
+        url_path='feed',
+        permission_classes=(IsAuthenticated,)
+    )
+    def feed(self, request):
+        """Новые рецепты авторов из подписок с курсорной пагинацией."""
+        paginator = KeysetPagination()
+        if is_materialized(request.user):
+            paginator.ordering = ENTRY_ORDERING
+            entries = paginator.paginate_queryset(
+                get_feed_entries(request.user), request)
+            recipes = Recipe.objects.in_bulk(
+                [entry.recipe_id for entry in entries])
+            page = [recipes[entry.recipe_id] for entry in entries
+                    if entry.recipe_id in recipes]
+        else:
+            paginator.ordering = RECIPE_ORDERING
+            page = paginator.paginate_queryset(
+                get_feed_recipes(request.user), request)
+        serializer = RecipeReadSerializer(
+            page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(self.serialize(serializer))
+
+    @action(methods=['get'], detail=False, url_path='pantry')
+    def pantry(self, request):
+        """Рецепты по доле имеющихся ингредиентов."""
+        serializer = PantrySerializer(
+            data={'ingredients': request.query_params.getlist('ingredients')})
+        serializer.is_valid(raise_exception=True)
+        matches = match_pantry(serializer.validated_data['ingredients'])
+        page = self.paginate_queryset(matches)
+        if page is not None:
+            matches = page
+        recipes = Recipe.objects.in_bulk(
+            [recipe_id for recipe_id, _, _ in matches])
+        matches = [match for match in matches if match[0] in recipes]
+        data = self.serialize(RecipeReadSerializer(
+            [recipes[recipe_id] for recipe_id, _, _ in matches],
+            many=True,
+            context=self.get_serializer_context()
+        ))
+        for item, (_, coverage, missing) in zip(data, matches):
+            item['coverage'] = round(coverage, 4)
+            item['missing_count'] = missing
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    @action(
+        methods=['get'],
+        detail=False,
+        url_path='download_shopping_cart',
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=(ShoppingListTextRenderer, ShoppingListCSVRenderer,
+                          ShoppingListJSONRenderer)
     )
     def load_shopping_list(self, request):
-        """Метод скачивания списка продуктов."""
-        user = get_object_or_404(User, username=request.user)
-        recipes_id = Cart.objects.filter(user=user).values('recipe')
-        recipes = Recipe.objects.filter(pk__in=recipes_id)
-        result_dict = {}
-        for recipe in recipes:
-            ingredients_list = IngredientAmount.objects.filter(recipe=recipe)
-            for ingredient in ingredients_list:
-                if ingredient.ingredient.name in result_dict:
-                    result_dict[ingredient.ingredient.name][0] += (
-                        ingredient.amount
-                    )
-                else:
-                    result_dict[ingredient.ingredient.name] = [
-                        ingredient.amount,
-                        ingredient.ingredient.measurement_unit
-                    ]
-        result = (
-            'Список покупок:\n'
+        """Метод скачивания списка продуктов в формате txt, csv или json."""
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(iter_shopping_list(request.user)),
+            content_type=f'{renderer.media_type}; charset=utf-8'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{renderer.filename}"'
+        )
+        return response
+
+    @action(
+        methods=['get'],
+        detail=False,
+        url_path='export',
+        permission_classes=(IsAdminUser,),
+        renderer_classes=(NDJSONRenderer,)
+    )
+    def export(self, request):
+        """Потоковая выгрузка всех рецептов в формате NDJSON."""
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            export_recipes(),
+            content_type=f'{renderer.media_type}; charset=utf-8'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{renderer.filename}"'
+        )
+        return response
+
+
+class MetricsView(APIView):
+    """Метрики эндпоинтов процесса для Prometheus."""
+
+    permission_classes = (IsAdminUser,)
+    renderer_classes = (PrometheusRenderer,)
+
+    def get(self, request):
+        return Response(
+            registry.render(),
+            content_type=request.accepted_renderer.content_type
         )
-        for key, value in result_dict.items():
-            result += f'\n{key} ({value[1]}) = {str(value[0])}'
-        return HttpResponse(result, content_type='text/plain')
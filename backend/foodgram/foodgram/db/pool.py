@@ -0,0 +1,286 @@
+import os
+import threading
+import time
+from collections import deque
+from functools import partial
+
+POOL_DEFAULTS = {
+    'SIZE': 5,
+    'TIMEOUT': 10,
+    'MAX_LIFETIME': 1800,
+    'CHECK_AFTER': 0,
+}
+CONNECTION_PARAMS = ('NAME', 'HOST', 'PORT', 'USER')
+
+_pools = {}
+_pools_pid = None
+_inherited = []
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    """Свободное соединение не появилось за TIMEOUT секунд."""
+
+
+class ConnectionPool:
+    """Пул открытых соединений с базой одного процесса.
+
+    Соединение отдаётся из пула после проверки, если оно простаивало
+    дольше CHECK_AFTER секунд, и закрывается, когда ему больше
+    MAX_LIFETIME секунд. Если проверка не прошла (например, база
+    перезапустилась), закрываются и все остальные простаивающие
+    соединения. Одновременно открыто не больше SIZE соединений,
+    остальные запросы ждут до TIMEOUT секунд. Соединения выводимого
+    из работы пула (retire) в него больше не возвращаются.
+    """
+
+    def __init__(self, size, timeout, max_lifetime, check_after, key=None):
+        self.key = key
+        self.pid = os.getpid()
+        self.retired = False
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+        self.condition = threading.Condition()
+        self.idle = deque()
+        self.created = {}
+        self.in_use = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0
+        self.timeouts = 0
+        self.opened = 0
+        self.closed = 0
+
+    def acquire(self, connect, check):
+        """Соединение из пула или новое, если свободных нет."""
+        connection, released = self.reserve()
+        if connection is not None and (
+                time.monotonic() - released < self.check_after
+                or check(connection)):
+            return connection
+        if connection is not None:
+            self.close(connection)
+            self.close_idle()
+        try:
+            connection = connect()
+        except BaseException:
+            with self.condition:
+                self.in_use -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self.created[connection] = time.monotonic()
+            self.opened += 1
+        return connection
+
+    def reserve(self):
+        """Место в пуле и простаивающее соединение, если оно есть."""
+        expired = []
+        with self.condition:
+            self.wait_for_slot()
+            self.in_use += 1
+            self.checkouts += 1
+            connection = released = None
+            while self.idle:
+                connection, released = self.idle.pop()
+                if not self.is_expired(connection):
+                    break
+                self.forget(connection)
+                expired.append(connection)
+                connection = released = None
+        for old in expired:
+            close_quietly(old)
+        return connection, released
+
+    def wait_for_slot(self):
+        if self.in_use < self.size:
+            return
+        started = time.monotonic()
+        self.waits += 1
+        try:
+            while self.in_use >= self.size:
+                remaining = started + self.timeout - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f'Нет свободных соединений за {self.timeout} с, '
+                        f'размер пула {self.size}.')
+                self.condition.wait(remaining)
+        finally:
+            self.wait_seconds += time.monotonic() - started
+
+    def release(self, connection, reusable):
+        """Возврат соединения; чужие и непригодные не возвращаются."""
+        with self.condition:
+            if (connection not in self.created
+                    or self.pid != os.getpid()):
+                _inherited.append(connection)
+                return
+            self.in_use -= 1
+            self.condition.notify()
+            if (reusable and not self.retired
+                    and not self.is_expired(connection)):
+                self.idle.append((connection, time.monotonic()))
+                return
+            self.forget(connection)
+        close_quietly(connection)
+
+    def close(self, connection):
+        with self.condition:
+            self.forget(connection)
+        close_quietly(connection)
+
+    def close_idle(self):
+        """Закрытие всех простаивающих соединений."""
+        with self.condition:
+            idle = [connection for connection, _ in self.idle]
+            self.idle.clear()
+            for connection in idle:
+                self.forget(connection)
+        for connection in idle:
+            close_quietly(connection)
+
+    def retire(self):
+        """Вывод пула из работы: простаивающие соединения закрываются
+        сразу, выданные — при возврате."""
+        with self.condition:
+            self.retired = True
+        self.close_idle()
+
+    def is_expired(self, connection):
+        return (self.max_lifetime is not None and time.monotonic()
+                - self.created[connection] > self.max_lifetime)
+
+    def forget(self, connection):
+        if self.created.pop(connection, None) is not None:
+            self.closed += 1
+
+    def stats(self):
+        with self.condition:
+            return {
+                'size': self.size,
+                'in_use': self.in_use,
+                'idle': len(self.idle),
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'wait_seconds': self.wait_seconds,
+                'timeouts': self.timeouts,
+                'opened': self.opened,
+                'closed': self.closed,
+            }
+
+
+def close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+def get_pool(alias, options, key=None):
+    """Пул соединения alias текущего процесса для параметров key.
+
+    Если параметры подключения alias изменились (так тестовый раннер
+    Django переключается на тестовую базу и обратно), прежний пул
+    выводится из работы, чтобы соединения не вели в старую базу.
+    После fork (воркеры gunicorn) пулы родителя не используются и не
+    закрываются: их сокеты общие с родителем, поэтому ссылки на них
+    просто сохраняются до конца процесса.
+    """
+    global _pools, _pools_pid
+    retired = None
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            _inherited.extend(_pools.values())
+            _pools, _pools_pid = {}, os.getpid()
+        pool = _pools.get(alias)
+        if pool is not None and pool.key != key:
+            retired, pool = _pools.pop(alias), None
+        if pool is None:
+            options = {**POOL_DEFAULTS, **options}
+            pool = _pools[alias] = ConnectionPool(
+                size=options['SIZE'],
+                timeout=options['TIMEOUT'],
+                max_lifetime=options['MAX_LIFETIME'],
+                check_after=options['CHECK_AFTER'],
+                key=key,
+            )
+    if retired is not None:
+        retired.retire()
+    return pool
+
+
+def close_pool(alias):
+    """Закрытие пула alias, например перед удалением его базы."""
+    with _pools_lock:
+        pool = _pools.pop(alias, None) if _pools_pid == os.getpid() else None
+    if pool is not None:
+        pool.retire()
+
+
+def get_pools():
+    """Пулы текущего процесса по алиасам соединений."""
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            return {}
+        return dict(_pools)
+
+
+class PooledDatabaseWrapperMixin:
+    """Соединения бэкенда Django берутся из пула и возвращаются в него.
+
+    Настройки пула задаются словарём POOL в DATABASES (см.
+    POOL_DEFAULTS). CONN_MAX_AGE оставляется равным 0: Django
+    «закрывает» соединение в конце запроса, и оно возвращается в пул.
+
+    Класс бэкенда определяет два метода для своего драйвера:
+    check_connection(connection) — соединение живо и готово к работе;
+    reset_connection(connection) — откат незавершённой транзакции
+    перед возвратом в пул, False, если соединение больше непригодно.
+    Соединение возвращается в тот пул, из которого было взято.
+    """
+
+    pool = None
+
+    def get_pool(self):
+        return get_pool(
+            self.alias,
+            self.settings_dict.get('POOL') or {},
+            tuple(self.settings_dict.get(name) for name in CONNECTION_PARAMS)
+        )
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool()
+        try:
+            connection = pool.acquire(
+                partial(super().get_new_connection, conn_params),
+                self.check_connection
+            )
+        except PoolTimeout as error:
+            raise self.Database.OperationalError(str(error)) from error
+        self.pool = pool
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = self.pool or self.get_pool()
+        if self.in_atomic_block:
+            # Обёртка продолжит ссылаться на соединение до выхода из
+            # atomic, поэтому в пул его возвращать нельзя.
+            pool.release(self.connection, reusable=False)
+            return
+        reusable = self.reset_connection(self.connection)
+        pool.release(self.connection, reusable)
+        if not reusable:
+            pool.close_idle()
+
+
+class PooledDatabaseCreationMixin:
+    """Тестовая база удаляется после закрытия соединений пула с ней."""
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pool(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,30 @@
+from django.db.backends.sqlite3 import base, creation
+
+from ..pool import PooledDatabaseCreationMixin, PooledDatabaseWrapperMixin
+
+
+class DatabaseCreation(PooledDatabaseCreationMixin,
+                       creation.DatabaseCreation):
+    pass
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """SQLite с пулом соединений: для разработки и проверки пула."""
+
+    creation_class = DatabaseCreation
+
+    def check_connection(self, connection):
+        try:
+            connection.execute('SELECT 1').close()
+        except self.Database.Error:
+            return False
+        return True
+
+    def reset_connection(self, connection):
+        if not connection.in_transaction:
+            return True
+        try:
+            connection.rollback()
+        except self.Database.Error:
+            return False
+        return True
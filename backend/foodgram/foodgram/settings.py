@@ -39,6 +39,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,12 +73,33 @@ WSGI_APPLICATION = 'foodgram.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': os.getenv('DB_ENGINE', default='django.db.backends.postgresql'),
+        'ENGINE': os.getenv('DB_ENGINE', default='foodgram.db.postgresql'),
         'NAME': os.getenv('DB_NAME', default='postgres'),
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        # Используется бэкендами foodgram.db.postgresql и
+        # foodgram.db.sqlite3; пул свой в каждом воркере gunicorn.
+        'POOL': {
+            'SIZE': int(os.getenv('DB_POOL_SIZE', default=5)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=10)),
+            'MAX_LIFETIME': float(
+                os.getenv('DB_POOL_MAX_LIFETIME', default=1800)),
+            'CHECK_AFTER': float(os.getenv('DB_POOL_CHECK_AFTER', default=0)),
+        },
+    }
+}
+
+# Версии данных, инвалидация и индексы общие для воркеров gunicorn и
+# management-команд, поэтому кэш по умолчанию файловый, а не LocMemCache.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', default='/tmp/foodgram_cache'),
     }
 }
 
@@ -128,6 +150,10 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 DJOSER = {
@@ -147,3 +173,32 @@ DJOSER = {
 
 MAX_AMOUNT_INGREDIENT = 32767
 MIN_AMOUNT_INGREDIENT = 1
+MAX_BULK_RECIPES = 100
+
+REFERENCE_DATA_CACHE_TIMEOUT = 60 * 60 * 24
+REFERENCE_DATA_MAX_AGE = 60
+
+RECIPE_CACHE_TIMEOUT = 60 * 60 * 24
+
+RECIPE_IMAGE_SIZES = {'card': 480, 'detail': 1024}
+RECIPE_IMAGE_QUALITY = 80
+RECIPE_IMAGE_WORKERS = 2
+
+INGREDIENT_SEARCH_LIMIT = 20
+INGREDIENT_SEARCH_CACHE_SIZE = 512
+
+PANTRY_MAX_INGREDIENTS = 100
+PANTRY_MAX_RESULTS = 1000
+PANTRY_MAX_CHANGES = 1000
+PANTRY_CHANGES_TIMEOUT = 86400
+
+RECOMMENDATIONS_TOP_K = 10
+RECOMMENDATIONS_MAX_USER_FAVORITES = 500
+
+FEED_FANOUT_THRESHOLD = 1000
+
+METRICS_DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS_QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+# Для тестов и отладки: запрос с большим числом SQL-запросов падает.
+QUERY_BUDGET = int(os.getenv('QUERY_BUDGET', default=0)) or None
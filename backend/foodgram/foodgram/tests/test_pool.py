@@ -0,0 +1,273 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import uuid
+from importlib import import_module
+from unittest import skipUnless
+
+from django.db import OperationalError, connections
+from django.test import SimpleTestCase
+
+from foodgram.db import pool as pool_module
+from foodgram.db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def make_pool(self, **options):
+        options = {'size': 2, 'timeout': 0.05, 'max_lifetime': 60,
+                   'check_after': 0, **options}
+        return ConnectionPool(**options)
+
+    @staticmethod
+    def check(connection):
+        return connection.alive
+
+    def test_released_connection_is_reused(self):
+        pool = self.make_pool()
+        first = pool.acquire(FakeConnection, self.check)
+        pool.release(first, reusable=True)
+        self.assertIs(pool.acquire(FakeConnection, self.check), first)
+        self.assertEqual(pool.stats()['opened'], 1)
+
+    def test_broken_connection_is_discarded_with_idle_ones(self):
+        pool = self.make_pool()
+        first = pool.acquire(FakeConnection, self.check)
+        second = pool.acquire(FakeConnection, self.check)
+        pool.release(first, reusable=True)
+        pool.release(second, reusable=True)
+        second.alive = False
+        third = pool.acquire(FakeConnection, self.check)
+        self.assertNotIn(third, (first, second))
+        self.assertTrue(first.closed and second.closed)
+        self.assertEqual(pool.stats()['idle'], 0)
+
+    def test_unusable_connection_is_closed_on_release(self):
+        pool = self.make_pool()
+        connection = pool.acquire(FakeConnection, self.check)
+        pool.release(connection, reusable=False)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['in_use'], 0)
+
+    def test_connection_is_recycled_after_lifetime(self):
+        pool = self.make_pool(max_lifetime=0.01)
+        first = pool.acquire(FakeConnection, self.check)
+        pool.release(first, reusable=True)
+        time.sleep(0.02)
+        self.assertIsNot(pool.acquire(FakeConnection, self.check), first)
+        self.assertTrue(first.closed)
+
+    def test_recently_used_connection_is_not_checked(self):
+        pool = self.make_pool(check_after=60)
+        first = pool.acquire(FakeConnection, self.check)
+        pool.release(first, reusable=True)
+        self.assertIs(pool.acquire(FakeConnection, lambda _: 1 / 0), first)
+
+    def test_waiting_for_free_connection_times_out(self):
+        pool = self.make_pool(size=1)
+        pool.acquire(FakeConnection, self.check)
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(FakeConnection, self.check)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_failed_connect_frees_slot(self):
+        pool = self.make_pool(size=1)
+
+        def refuse():
+            raise ConnectionError
+
+        with self.assertRaises(ConnectionError):
+            pool.acquire(refuse, self.check)
+        self.assertEqual(pool.stats()['in_use'], 0)
+        pool.acquire(FakeConnection, self.check)
+
+    def test_retired_pool_closes_connections(self):
+        pool = self.make_pool()
+        idle = pool.acquire(FakeConnection, self.check)
+        busy = pool.acquire(FakeConnection, self.check)
+        pool.release(idle, reusable=True)
+        pool.retire()
+        self.assertTrue(idle.closed)
+        self.assertFalse(busy.closed)
+        pool.release(busy, reusable=True)
+        self.assertTrue(busy.closed)
+        self.assertEqual(pool.stats()['idle'], 0)
+
+
+class PooledBackendTestsMixin:
+    """Проверки бэкенда с пулом на настоящих соединениях."""
+
+    engine = None
+    pool_options = {'SIZE': 2, 'TIMEOUT': 0.05, 'MAX_LIFETIME': 60,
+                    'CHECK_AFTER': 0}
+
+    def get_settings(self):
+        return {**connections['default'].settings_dict,
+                'ENGINE': self.engine}
+
+    def make_wrapper(self, alias=None, engine=None, **pool_options):
+        engine = engine or self.engine
+        alias = alias or self.alias
+        wrapper = import_module(f'{engine}.base').DatabaseWrapper(
+            {**self.get_settings(), 'ENGINE': engine,
+             'POOL': {**self.pool_options, **pool_options}},
+            alias)
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def setUp(self):
+        super().setUp()
+        self.alias = f'pool-{uuid.uuid4().hex}'
+        self.addCleanup(self.drop_pool)
+
+    def drop_pool(self):
+        pool_module.close_pool(self.alias)
+
+    def raw_connection(self, wrapper):
+        wrapper.ensure_connection()
+        return wrapper.connection
+
+    def test_connection_is_reused(self):
+        wrapper = self.make_wrapper()
+        raw = self.raw_connection(wrapper)
+        wrapper.close()
+        self.assertIs(self.raw_connection(wrapper), raw)
+        self.assertEqual(wrapper.get_pool().stats()['opened'], 1)
+
+    def test_broken_connection_is_replaced(self):
+        wrapper = self.make_wrapper()
+        raw = self.raw_connection(wrapper)
+        wrapper.close()
+        self.break_connection(raw)
+        self.assertIsNot(self.raw_connection(wrapper), raw)
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            self.assertEqual(cursor.fetchone(), (1,))
+
+    def test_connection_is_recycled_after_lifetime(self):
+        wrapper = self.make_wrapper(MAX_LIFETIME=0.01)
+        raw = self.raw_connection(wrapper)
+        wrapper.close()
+        time.sleep(0.02)
+        self.assertIsNot(self.raw_connection(wrapper), raw)
+        self.assertEqual(wrapper.get_pool().stats()['closed'], 1)
+
+    def test_open_transaction_is_rolled_back(self):
+        wrapper = self.make_wrapper()
+        wrapper.ensure_connection()
+        wrapper.set_autocommit(False)
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        raw = wrapper.connection
+        wrapper.close()
+        self.assertFalse(self.in_transaction(raw))
+        self.assertIs(self.raw_connection(wrapper), raw)
+
+    def test_pool_size_is_limited(self):
+        first = self.make_wrapper(SIZE=1)
+        second = self.make_wrapper(SIZE=1)
+        first.ensure_connection()
+        with self.assertRaises(OperationalError):
+            second.ensure_connection()
+        first.close()
+        second.ensure_connection()
+
+
+class SQLitePoolTests(PooledBackendTestsMixin, SimpleTestCase):
+    engine = 'foodgram.db.sqlite3'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory, ignore_errors=True)
+        super().tearDownClass()
+
+    def get_settings(self):
+        return {**super().get_settings(),
+                'NAME': os.path.join(self.directory, 'pool.sqlite3')}
+
+    @staticmethod
+    def break_connection(raw):
+        raw.close()
+
+    def database_file(self, wrapper):
+        with wrapper.cursor() as cursor:
+            cursor.execute('PRAGMA database_list')
+            return cursor.fetchone()[2]
+
+    def test_reconnect_follows_changed_name(self):
+        wrapper = self.make_wrapper()
+        first = self.database_file(wrapper)
+        raw = wrapper.connection
+        wrapper.close()
+        second = os.path.join(self.directory, 'other.sqlite3')
+        wrapper.settings_dict['NAME'] = second
+        self.assertEqual(self.database_file(wrapper), second)
+        self.assertNotEqual(first, second)
+        self.assertIsNot(wrapper.connection, raw)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            raw.execute('SELECT 1')
+
+    def test_connection_returns_to_its_own_pool(self):
+        wrapper = self.make_wrapper()
+        wrapper.ensure_connection()
+        pool = wrapper.get_pool()
+        raw = wrapper.connection
+        other = self.make_wrapper()
+        other.settings_dict['NAME'] = os.path.join(
+            self.directory, 'other.sqlite3')
+        other.ensure_connection()
+        self.assertIsNot(other.get_pool(), pool)
+        wrapper.close()
+        self.assertEqual(pool.stats()['idle'], 0)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            raw.execute('SELECT 1')
+
+    def test_destroy_test_db_closes_pool(self):
+        wrapper = self.make_wrapper()
+        raw = self.raw_connection(wrapper)
+        wrapper.close()
+        wrapper.creation._destroy_test_db(':memory:', verbosity=0)
+        self.assertNotIn(self.alias, pool_module.get_pools())
+        with self.assertRaises(sqlite3.ProgrammingError):
+            raw.execute('SELECT 1')
+
+    @staticmethod
+    def in_transaction(raw):
+        return raw.in_transaction
+
+
+@skipUnless(connections['default'].vendor == 'postgresql',
+            'Нужна база PostgreSQL.')
+class PostgreSQLPoolTests(PooledBackendTestsMixin, SimpleTestCase):
+    engine = 'foodgram.db.postgresql'
+
+    def break_connection(self, raw):
+        """Завершение серверного процесса, как при перезапуске базы."""
+        admin = self.make_wrapper(
+            alias=f'{self.alias}-admin',
+            engine='django.db.backends.postgresql')
+        with admin.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)',
+                           [raw.get_backend_pid()])
+
+    @staticmethod
+    def in_transaction(raw):
+        from psycopg2 import extensions
+        return (raw.get_transaction_status()
+                != extensions.TRANSACTION_STATUS_IDLE)
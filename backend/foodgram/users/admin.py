@@ -10,7 +10,7 @@ class UserAdmin(UserAdmin):
 
     list_display = (
         'id', 'username', 'email', 'first_name',
-        'last_name', 'password'
+        'last_name', 'password', 'recipes_count', 'followers_count'
     )
     list_display_links = ('id', 'username')
     search_fields = ('username', 'email',)
@@ -1,9 +1,10 @@
 from djoser.serializers import UserCreateSerializer, UserSerializer
 
-from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
+from api.relations import get_relations
+
 from .models import Follow, User
 
 
@@ -33,12 +34,10 @@ class MyUserSerializer(UserSerializer):
     def get_is_subscribed(self, obj):
         """Метод определения подписки на пользователей."""
         if self.context:
-            username = self.context['request'].user
-            if not username.is_authenticated or obj.username == username:
+            user = self.context['request'].user
+            if not user.is_authenticated or obj == user:
                 return False
-            user = get_object_or_404(User, username=username)
-            author = get_object_or_404(User, username=obj.username)
-            return Follow.objects.filter(user=user, author=author).exists()
+            return get_relations(self.context['request']).is_subscribed(obj)
         return False
 
 
@@ -1,9 +1,15 @@
+from djoser.views import UserViewSet as DjoserUserViewSet
+
+from django.db import transaction
+from django.db.models import OuterRef, Prefetch, Subquery
 from django.shortcuts import get_object_or_404
 from rest_framework import mixins, status, viewsets
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from api.mixins import SerializationMetricsMixin, StreamingListMixin
+from api.models import Recipe
 from api.pagination import CustomPagination
 from api.serializers import FollowListSerializer
 from users.models import Follow, User
@@ -11,6 +17,10 @@ from users.models import Follow, User
 from .serializers import FollowSerializer
 
 
+class UserViewSet(StreamingListMixin, DjoserUserViewSet):
+    """Пользователи djoser с потоковой выдачей полного списка."""
+
+
 class APIFollow(APIView):
     """Вьюшка для создания/удаления подписки."""
 
@@ -20,7 +30,8 @@ class APIFollow(APIView):
         author = get_object_or_404(User, pk=pk)
         serializer = FollowSerializer(data={"user": user.pk, "author": pk})
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        with transaction.atomic():
+            serializer.save()
         author_serializer = FollowListSerializer(author)
         return Response(
             author_serializer.data,
@@ -35,16 +46,40 @@ class APIFollow(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class FollowViewSet(mixins.ListModelMixin,
+class FollowViewSet(SerializationMetricsMixin,
+                    mixins.ListModelMixin,
                     viewsets.GenericViewSet):
     """Вьюшка для просмотра подписок."""
 
     pagination_class = CustomPagination
+    cursor_ordering = ('id',)
     serializer_class = FollowListSerializer
     permission_classes = (IsAuthenticated,)
 
+    def get_recipes_limit(self):
+        """Ограничение количества рецептов автора из параметра запроса."""
+        limit = self.request.query_params.get('recipes_limit')
+        if limit and limit.isdigit():
+            return int(limit)
+        return None
+
     def get_queryset(self):
-        """Список подписок."""
-        user = get_object_or_404(User, username=self.request.user)
-        subscribes = Follow.objects.filter(user=user).values('author')
-        return User.objects.filter(pk__in=subscribes)
+        """Список подписок с рецептами."""
+        user = self.request.user
+        recipes = Recipe.objects.order_by('-pub_date', '-id')
+        limit = self.get_recipes_limit()
+        if limit is not None:
+            recipes = recipes.filter(pk__in=Subquery(
+                Recipe.objects
+                .filter(author=OuterRef('author'))
+                .order_by('-pub_date', '-id')
+                .values('pk')[:limit]
+            ))
+        return (
+            User.objects
+            .filter(following__user=user)
+            .prefetch_related(Prefetch(
+                'recipes', queryset=recipes, to_attr='prefetched_recipes'
+            ))
+            .order_by('id')
+        )